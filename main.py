@@ -5,42 +5,103 @@ Sequential voice flow with Whisper + GPT-4 + TTS.
 
 import os
 import uuid
+import atexit
+import asyncio
+import hashlib
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+from random import choice
+from binascii import b2a_base64
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, AsyncIterator, Awaitable, Callable
 
 from dotenv import load_dotenv
-from fastapi import FastAPI, File, UploadFile, HTTPException, Form
+from fastapi import FastAPI, File, UploadFile, HTTPException, Form, Request, WebSocket, WebSocketDisconnect
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse, FileResponse, Response
-from pydantic import BaseModel
+from fastapi.responses import HTMLResponse, FileResponse, ORJSONResponse, Response, StreamingResponse
+import orjson
+import pysbd
+
+try:
+    import pybase64
+except ImportError:
+    pybase64 = None
+from cachetools import LRUCache
 
 from services.questions_db import get_questions_db
-from services.file_parser import parse_pdf
+from services.question_ranker import build_index, shortlist
+from services.session_store import (
+    Session,
+    get_redis,
+    close_redis,
+    load_session,
+    save_session,
+    store_dossier,
+    load_dossier,
+    store_speech_text,
+    load_speech_text,
+    gc_sessions
+)
+from services.file_parser import (
+    parse_pdf,
+    parse_pdf_async,
+    extract_pdf_pages,
+    join_pdf_pages,
+    content_digest,
+    PARSE_CACHE_SIZE
+)
 from services.scraper import (
-    update_context_if_needed, 
-    force_rescrape, 
-    get_master_context_text,
-    load_context
+    update_context_if_needed_async, 
+    force_rescrape_async, 
+    get_master_context_info,
+    load_context_async
 )
 from services.openai_services import (
+    init_client,
+    close_client,
+    warm_up,
     transcribe_audio,
     chat_response,
     text_to_speech,
+    stream_speech,
+    gather_limited,
     categorize_questions,
     generate_debrief,
     get_coach_intro,
-    get_question_feedback,
-    select_next_question
+    DOSSIER_EXCERPT_LENGTH,
+    select_next_question,
+    stream_question_feedback,
+    stream_next_question
 )
 
 # Load environment variables
 load_dotenv()
 
+
+# ============ Logging ============
+# Records are handed to a background thread, so handlers never block the event loop on stdout
+
+_log_queue: queue.Queue = queue.Queue(-1)
+_log_handler = logging.StreamHandler()
+_log_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+_log_listener = QueueListener(_log_queue, _log_handler)
+_log_listener.start()
+atexit.register(_log_listener.stop)
+_queue_handler = QueueHandler(_log_queue)
+_queue_handler.setFormatter(logging.Formatter("%(message)s"))  # full format is applied by _log_handler
+logging.basicConfig(level=os.environ.get("LOG_LEVEL", "INFO"), handlers=[_queue_handler])
+
+logger = logging.getLogger("coach")
+
 # Create FastAPI app
 app = FastAPI(
     title="X-HEC Interview Coach",
     description="Agent IA pour s'entraîner aux entretiens X-HEC Entrepreneurs",
-    version="3.0.0"
+    version="3.0.0",
+    default_response_class=ORJSONResponse
 )
 
 # Mount static files
@@ -53,67 +114,200 @@ UPLOADS_DIR = Path(__file__).parent / "uploads"
 UPLOADS_DIR.mkdir(exist_ok=True)
 
 
-# ============ In-Memory Session Storage ============
+# ============ Static Coach Phrases ============
+# Fixed lines the coach says verbatim; their audio is synthesized once at startup.
 
-class Session:
-    def __init__(
-        self,
-        session_id: str,
-        mode: str,
-        dossier_text: str
-    ):
-        self.session_id = session_id
-        self.mode = mode
-        self.dossier_text = dossier_text
-        self.transcript: List[Dict[str, str]] = []
-        self.current_theme: Optional[str] = None
-        self.current_question: Optional[str] = None
-        self.asked_questions: List[str] = []
-        self.started = False
+THEME_EXHAUSTED_TEXT = "Tu as fait le tour de ce thème ! Tu veux passer à un autre thème ou faire le débrief ?"
+ALL_QUESTIONS_DONE_TEXT = "On a fait le tour ! Tu veux faire le débrief ?"
+STATIC_PHRASES = (THEME_EXHAUSTED_TEXT, ALL_QUESTIONS_DONE_TEXT)
 
-_sessions: Dict[str, Session] = {}
+TTS_CACHE_TTL = 86400  # seconds
+app.state.static_audio = {}
 
 
-# ============ Pydantic Models ============
+# ============ Startup Events ============
 
-class ChatMessage(BaseModel):
-    role: str
-    content: str
+def web_workers() -> int:
+    """
+    Number of uvicorn workers (WEB_CONCURRENCY, default 1).
+    
+    The Procfile and render.yaml start commands pass the same variable to
+    --workers, so the PDF pool below is sized for the processes that really
+    run. Raise it only with REDIS_URL set: otherwise sessions and dossier
+    tokens live in each process and another worker would not find them.
+    """
+    return int(os.getenv("WEB_CONCURRENCY", 1))
 
 
-# ============ Startup Events ============
+# PDF worker processes per web worker, so all workers together use one per core
+PDF_POOL_WORKERS = max(1, (os.cpu_count() or 1) // web_workers())
+
 
 @app.on_event("startup")
 async def startup_event():
     """Initialize the application on startup."""
-    print("🚀 Starting X-HEC Interview Coach v3.0 (Sequential Flow)...")
+    logger.info("🚀 Starting X-HEC Interview Coach v3.0 (Sequential Flow)...")
     
     # Check OpenAI API key
     if os.environ.get("OPENAI_API_KEY"):
-        print("✅ OpenAI API key configured")
+        logger.info("✅ OpenAI API key configured")
     else:
-        print("⚠️ OPENAI_API_KEY not set - API will not work")
+        logger.warning("⚠️ OPENAI_API_KEY not set - API will not work")
+    
+    # Shared OpenAI client (one connection pool for the whole process)
+    init_client()
+    
+    if web_workers() > 1 and get_redis() is None:
+        logger.warning("⚠️ WEB_CONCURRENCY > 1 without REDIS_URL: sessions are not shared between workers")
+    
+    # Resolve the frontend entry point once instead of stat-ing it per request
+    index_path = STATIC_DIR / "index.html"
+    app.state.index_path = str(index_path) if index_path.exists() else None
+    
+    # PDF parsing is CPU-bound pure Python, keep it off the event loop
+    app.state.pdf_pool = ProcessPoolExecutor(max_workers=PDF_POOL_WORKERS)
+    
+    # Slow, network-bound initialization runs in the background so the
+    # server accepts connections right away; routes wait on app.state.ready
+    app.state.ready = asyncio.Event()
+    app.state.init_task = asyncio.create_task(_bg_init())
+    
+    # Scraping can take many seconds; until it finishes the cached context is used
+    app.state.scrape_task = asyncio.create_task(_refresh_context())
+
+
+async def _bg_init():
+    """Warm up OpenAI and load questions/themes."""
+    # Pre-generate audio for the static coach phrases (this also warms up TTS)
+    try:
+        audios = await gather_limited(text_to_speech(text) for text in STATIC_PHRASES)
+        app.state.static_audio = dict(zip(STATIC_PHRASES, audios))
+        logger.info("✅ Pre-generated audio for %s static phrases", len(audios))
+    except Exception as e:
+        logger.warning("⚠️ Could not pre-generate static audio: %s", e)
+    
+    # Warm up Whisper
+    try:
+        await warm_up()
+        logger.info("✅ Whisper warmed up")
+    except Exception as e:
+        logger.warning("⚠️ Whisper warm-up failed: %s", e)
     
     # Load questions database
     try:
-        db = get_questions_db()
-        print(f"✅ Questions database loaded: {db.get_questions_count()} questions")
+        db = await asyncio.to_thread(get_questions_db)
+        logger.info("✅ Questions database loaded: %s questions", db.get_questions_count())
         
         # Categorize with AI if not already done
         if not db.has_themes():
-            await db.categorize_with_ai()
+            await categorize_once(db)
     except Exception as e:
-        print(f"⚠️ Could not load questions database: {e}")
+        logger.warning("⚠️ Could not load questions database: %s", e)
     
-    # Check and update master context if needed
+    # Embed all questions once for next-question shortlisting
+    try:
+        await build_index(get_questions_db().get_all_questions())
+        logger.info("✅ Question embeddings ready")
+    except Exception as e:
+        logger.warning("⚠️ Could not embed questions: %s", e)
+    
+    app.state.ready.set()
+    logger.info("✅ Initialization complete")
+
+
+async def _refresh_context():
+    """Rescrape pineurs.com if the master context is stale (one worker at a time)."""
     try:
-        updated = update_context_if_needed()
+        redis = get_redis()
+        if redis is None:
+            updated = await update_context_if_needed_async()
+        else:
+            lock = redis.lock("scrape_lock", timeout=120, blocking=False)
+            if not await lock.acquire():
+                logger.info("✅ Master context refresh already running in another worker")
+                return
+            try:
+                updated = await update_context_if_needed_async()
+            finally:
+                await lock.release()
+        
         if updated:
-            print("✅ Master context updated from pineurs.com")
+            logger.info("✅ Master context updated from pineurs.com")
         else:
-            print("✅ Master context loaded from cache")
+            logger.info("✅ Master context loaded from cache")
     except Exception as e:
-        print(f"⚠️ Could not update master context: {e}")
+        logger.warning("⚠️ Could not update master context: %s", e)
+
+
+async def categorize_once(db):
+    """
+    Categorize the questions with AI in a single worker.
+    
+    With Redis, workers take turns on a lock: the first one categorizes and
+    saves themes_cache.json, the others then load that file instead of
+    asking the AI again (which could name the themes differently).
+    """
+    redis = get_redis()
+    if redis is None:
+        await db.categorize_with_ai()
+        return
+    
+    async with redis.lock("categorize_lock", timeout=600, blocking_timeout=600):
+        if db.reload_themes():
+            logger.info("✅ Loaded themes categorized by another worker")
+        else:
+            await db.categorize_with_ai()
+
+
+async def wait_until_ready():
+    """Wait for background initialization before serving question/context routes."""
+    try:
+        await asyncio.wait_for(app.state.ready.wait(), timeout=30)
+    except asyncio.TimeoutError:
+        raise HTTPException(503, "Le service démarre, réessaie dans quelques secondes")
+    
+    # Pick up themes recategorized by another worker (one stat per request)
+    if get_redis() is not None and get_questions_db().refresh_themes():
+        _json_cache.clear()
+
+
+# Serialized bodies (and their ETags) of read-mostly routes, cleared when questions/themes change
+_json_cache: Dict[str, tuple] = {}
+
+
+def cached_json(key: str, build: Callable[[], dict], request: Optional[Request] = None) -> Response:
+    """
+    Serve a JSON payload serialized once and reused until _json_cache is cleared.
+    
+    With the request, the response carries an ETag and "no-cache": browsers
+    revalidate every time (304 while unchanged), so they never keep a
+    payload the server has already replaced.
+    """
+    cached = _json_cache.get(key)
+    if cached is None:
+        body = orjson.dumps(build())
+        cached = _json_cache[key] = (body, f'"{hashlib.blake2b(body, digest_size=8).hexdigest()}"')
+    body, etag = cached
+    
+    if request is None:
+        return Response(content=body, media_type="application/json")
+    
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Release shared network clients and worker pools."""
+    app.state.init_task.cancel()
+    app.state.scrape_task.cancel()
+    if getattr(app.state, "categorize_task", None) is not None:
+        app.state.categorize_task.cancel()
+    app.state.pdf_pool.shutdown(wait=False, cancel_futures=True)
+    await close_client()
+    await close_redis()
 
 
 # ============ Root & Static Routes ============
@@ -121,23 +315,74 @@ async def startup_event():
 @app.get("/", response_class=HTMLResponse)
 async def root():
     """Serve the main HTML page."""
-    index_path = STATIC_DIR / "index.html"
-    if index_path.exists():
-        return FileResponse(index_path)
+    if app.state.index_path:
+        return FileResponse(app.state.index_path)
     return HTMLResponse("<h1>X-HEC Interview Coach</h1><p>Frontend not found.</p>")
 
 
 # ============ File Upload Routes ============
 
+MAX_DOSSIER_BYTES = 10 * 1024 * 1024
+PDF_PAGE_WORKERS = min(4, PDF_POOL_WORKERS)
+PARALLEL_PDF_MIN_BYTES = 256 * 1024  # smaller dossiers parse faster in one process
+
+# Parsed text of recent uploads by content hash (re-uploads and retries skip parsing)
+_parsed_dossiers: LRUCache = LRUCache(maxsize=PARSE_CACHE_SIZE)
+
+
+async def _parse_pdf_off_loop(dossier: UploadFile) -> str:
+    """Parse an uploaded PDF without blocking the event loop (cached by content hash)."""
+    content = await dossier.read()
+    digest = content_digest(content)
+    text = _parsed_dossiers.get(digest)
+    if text is None:
+        text = await _parse_pdf_bytes(dossier, content)
+        _parsed_dossiers[digest] = text
+    return text
+
+
+async def _parse_pdf_bytes(dossier: UploadFile, content: bytes) -> str:
+    """
+    Parse the upload's bytes in the PDF process pool.
+    
+    PDFium is not thread-safe within a process, so the process pool is preferred
+    (it needs the bytes, since a file handle cannot be sent to another process).
+    If a worker died (e.g. OOM on a huge PDF) the pool is broken for good:
+    replace it and parse this upload in the threadpool instead of failing,
+    straight from the upload's spooled temp file.
+    """
+    loop = asyncio.get_running_loop()
+    try:
+        if len(content) < PARALLEL_PDF_MIN_BYTES or PDF_PAGE_WORKERS == 1:
+            return await loop.run_in_executor(app.state.pdf_pool, parse_pdf, content)
+        
+        # Interleave pages across processes: worker k takes pages k, k+N, k+2N...
+        strided_pages = await asyncio.gather(*(
+            loop.run_in_executor(app.state.pdf_pool, extract_pdf_pages, content, start, PDF_PAGE_WORKERS)
+            for start in range(PDF_PAGE_WORKERS)
+        ))
+        return join_pdf_pages(strided_pages)
+    except BrokenProcessPool:
+        logger.warning("⚠️ PDF process pool broken, recreating it")
+        app.state.pdf_pool = ProcessPoolExecutor(max_workers=PDF_POOL_WORKERS)
+        await dossier.seek(0)
+        return await parse_pdf_async(dossier.file)
+
+
 @app.post("/api/upload")
 async def upload_dossier(dossier: UploadFile = File(...)):
     """Upload the candidate's application dossier (PDF)."""
+    await wait_until_ready()
+    
     if not dossier.filename.lower().endswith('.pdf'):
         raise HTTPException(400, "Le dossier doit être un fichier PDF")
     
+    # Starlette has already spooled the upload (to disk past 1 MB); refuse huge files before reading
+    if dossier.size is not None and dossier.size > MAX_DOSSIER_BYTES:
+        raise HTTPException(413, "Le dossier dépasse la taille maximale de 10 Mo.")
+    
     try:
-        dossier_content = await dossier.read()
-        dossier_text = parse_pdf(dossier_content)
+        dossier_text = await _parse_pdf_off_loop(dossier)
         
         if not dossier_text or len(dossier_text.strip()) < 50:
             raise HTTPException(400, "Le dossier semble vide ou invalide.")
@@ -148,7 +393,8 @@ async def upload_dossier(dossier: UploadFile = File(...)):
             "success": True,
             "dossier_preview": dossier_text[:500] + "..." if len(dossier_text) > 500 else dossier_text,
             "questions_count": questions_db.get_questions_count(),
-            "_dossier_text": dossier_text
+            # Only the intro prompt reads the dossier, and only its start
+            "dossier_token": await store_dossier(dossier_text[:DOSSIER_EXCERPT_LENGTH])
         }
         
     except ValueError as e:
@@ -160,11 +406,15 @@ async def upload_dossier(dossier: UploadFile = File(...)):
 # ============ Session Routes ============
 
 @app.post("/api/session/create")
-async def create_session(mode: str = Form(...), dossier_text: str = Form(...)):
-    """Create a new coaching session."""
+async def create_session(mode: str = Form(...), dossier_token: str = Form(...)):
+    """Create a new coaching session from a previously uploaded dossier."""
     if mode not in ["question_by_question", "full_interview"]:
         raise HTTPException(400, f"Mode invalide: {mode}")
     
+    dossier_text = await load_dossier(dossier_token)
+    if dossier_text is None:
+        raise HTTPException(400, "Dossier expiré, merci de le téléverser à nouveau")
+    
     session_id = str(uuid.uuid4())
     
     session = Session(
@@ -172,7 +422,7 @@ async def create_session(mode: str = Form(...), dossier_text: str = Form(...)):
         mode=mode,
         dossier_text=dossier_text
     )
-    _sessions[session_id] = session
+    await save_session(session)
     
     return {
         "success": True,
@@ -184,48 +434,55 @@ async def create_session(mode: str = Form(...), dossier_text: str = Form(...)):
 @app.get("/api/session/{session_id}/intro")
 async def get_session_intro(session_id: str):
     """Get the coach's intro message for a session."""
-    session = _sessions.get(session_id)
+    await wait_until_ready()
+    
+    session = await load_session(session_id)
     if not session:
         raise HTTPException(404, "Session non trouvée")
     
-    master_context = get_master_context_text()
+    # dossier_text is kept (it is only the DOSSIER_EXCERPT_LENGTH excerpt), so a
+    # reload or retry builds the same prompt and hits the intro cache
+    intro = await get_coach_intro(session.dossier_text, get_master_context_info()["excerpt"])
     
-    intro = await get_coach_intro(session.dossier_text, master_context)
-    
-    # Add to transcript
-    session.transcript.append({"role": "assistant", "content": intro})
-    session.started = True
-    
-    # Generate audio
-    audio_bytes = await text_to_speech(intro)
+    # Add to transcript (once, even if the intro is requested again)
+    if not session.started:
+        session.add_message("assistant", intro)
+        session.started = True
+        await save_session(session, "transcript", "started")
     
     return {
         "success": True,
         "text": intro,
-        "audio_base64": __import__('base64').b64encode(audio_bytes).decode('utf-8')
+        "audio_url": await speech_url(intro)
     }
 
 
 # ============ Themes & Questions Routes ============
 
 @app.get("/api/themes")
-async def get_themes():
+async def get_themes(request: Request):
     """Get available themes with question counts."""
+    await wait_until_ready()
+    
     db = get_questions_db()
     
     # Categorize if not done yet
     if not db.has_themes():
-        await db.categorize_with_ai()
+        await categorize_once(db)
+        _json_cache.clear()
     
-    return {
-        "success": True,
-        "themes": db.get_themes_with_counts()
-    }
+    return cached_json(
+        "themes",
+        lambda: {"success": True, "themes": db.get_themes_with_counts()},
+        request
+    )
 
 
 @app.get("/api/themes/{theme}/questions")
 async def get_theme_questions(theme: str, session_id: Optional[str] = None):
     """Get questions for a specific theme."""
+    await wait_until_ready()
+    
     db = get_questions_db()
     questions = db.get_questions_by_theme(theme)
     
@@ -233,13 +490,11 @@ async def get_theme_questions(theme: str, session_id: Optional[str] = None):
         raise HTTPException(404, f"Thème non trouvé: {theme}")
     
     # Filter out already asked questions if session provided
-    asked = []
+    available = questions
     if session_id:
-        session = _sessions.get(session_id)
+        session = await load_session(session_id)
         if session:
-            asked = session.asked_questions
-    
-    available = [q for q in questions if q not in asked]
+            available = session.available_questions(questions)
     
     return {
         "success": True,
@@ -253,7 +508,9 @@ async def get_theme_questions(theme: str, session_id: Optional[str] = None):
 @app.post("/api/session/{session_id}/select-theme")
 async def select_theme(session_id: str, theme: str = Form(...)):
     """Select a theme for the session."""
-    session = _sessions.get(session_id)
+    await wait_until_ready()
+    
+    session = await load_session(session_id)
     if not session:
         raise HTTPException(404, "Session non trouvée")
     
@@ -265,65 +522,79 @@ async def select_theme(session_id: str, theme: str = Form(...)):
     
     # Generate coach response about the theme
     questions = db.get_questions_by_theme(theme)
-    available = [q for q in questions if q not in session.asked_questions]
+    available = session.available_questions(questions)
     
     response_text = f"Très bien, on va travailler sur le thème « {theme} ». J'ai {len(available)} questions pour toi sur ce sujet. Tu veux que je choisisse une question au hasard, ou tu préfères choisir toi-même ?"
     
-    session.transcript.append({"role": "assistant", "content": response_text})
-    
-    audio_bytes = await text_to_speech(response_text)
+    session.add_message("assistant", response_text)
+    await save_session(session, "current_theme", "transcript")
     
     return {
         "success": True,
         "text": response_text,
-        "audio_base64": __import__('base64').b64encode(audio_bytes).decode('utf-8'),
+        "audio_url": await speech_url(response_text),
         "available_questions": available
     }
 
 
-@app.post("/api/session/{session_id}/select-question")
-async def select_question(session_id: str, question: Optional[str] = Form(None), random: bool = Form(False)):
-    """Select a specific question or get a random one."""
-    session = _sessions.get(session_id)
+async def _choose_question(session_id: str, question: Optional[str], random: bool):
+    """
+    Shared part of the select-question routes.
+    
+    Returns (session, question, available, last_exchange), or a ready-made
+    "theme exhausted" response when no question is left.
+    """
+    session = await load_session(session_id)
     if not session:
         raise HTTPException(404, "Session non trouvée")
     
-    if not session.current_theme:
+    db = get_questions_db()
+    # A recategorization may have renamed the session's theme
+    if session.current_theme not in db.get_themes():
         raise HTTPException(400, "Sélectionne d'abord un thème")
     
-    db = get_questions_db()
-    available = [q for q in db.get_questions_by_theme(session.current_theme) if q not in session.asked_questions]
+    available = session.available_questions(db.get_questions_by_theme(session.current_theme))
     
     if not available:
         return {
             "success": False,
             "message": "Plus de questions disponibles dans ce thème",
-            "text": "Tu as fait le tour de ce thème ! Tu veux passer à un autre thème ou faire le débrief ?",
-            "audio_base64": __import__('base64').b64encode(
-                await text_to_speech("Tu as fait le tour de ce thème ! Tu veux passer à un autre thème ou faire le débrief ?")
-            ).decode('utf-8')
+            "text": THEME_EXHAUSTED_TEXT,
+            "audio_url": await speech_url(THEME_EXHAUSTED_TEXT)
         }
     
     if random or not question:
-        import random as rand
-        question = rand.choice(available)
+        question = choice(available)
     elif question not in available:
         raise HTTPException(400, "Question non disponible")
     
     session.current_question = question
-    session.asked_questions.append(question)
+    session.mark_asked(question)
+    
+    # Build last_exchange context from previous Q&A if available
+    last_exchange = None
+    if len(session.asked_questions) >= 2:
+        prev_question = session.asked_questions[-2]
+        # Find last user response in transcript
+        for item in reversed(session.transcript):
+            if item["role"] == "user":
+                last_exchange = {"question": prev_question, "response": item["content"]}
+                break
+    
+    return session, question, available, last_exchange
+
+
+@app.post("/api/session/{session_id}/select-question")
+async def select_question(session_id: str, question: Optional[str] = Form(None), random: bool = Form(False)):
+    """Select a specific question or get a random one."""
+    await wait_until_ready()
+    
+    chosen = await _choose_question(session_id, question, random)
+    if isinstance(chosen, dict):
+        return chosen
+    session, question, available, last_exchange = chosen
     
     try:
-        # Build last_exchange context from previous Q&A if available
-        last_exchange = None
-        if len(session.asked_questions) >= 2:
-            prev_question = session.asked_questions[-2]
-            # Find last user response in transcript
-            for item in reversed(session.transcript):
-                if item["role"] == "user":
-                    last_exchange = {"question": prev_question, "response": item["content"]}
-                    break
-        
         # Generate coach asking the question
         intro = await select_next_question(
             session.current_theme,
@@ -336,23 +607,60 @@ async def select_question(session_id: str, question: Optional[str] = Form(None),
         if not intro:
             intro = question
         
-        session.transcript.append({"role": "assistant", "content": intro})
-        
-        audio_bytes = await text_to_speech(intro)
+        session.add_message("assistant", intro)
+        await save_session(session, "current_question", "asked_questions", "transcript")
         
         return {
             "success": True,
             "question": question,
             "text": intro,
-            "audio_base64": __import__('base64').b64encode(audio_bytes).decode('utf-8')
+            "audio_url": await speech_url(intro)
         }
     except Exception as e:
-        print(f"❌ Error in select_question: {type(e).__name__}: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("❌ Error in select_question: %s: %s", type(e).__name__, e)
         raise HTTPException(500, f"Erreur lors de la sélection: {type(e).__name__}: {str(e)}")
 
 
+@app.post("/api/session/{session_id}/select-question/stream")
+async def select_question_stream(session_id: str, question: Optional[str] = Form(None), random: bool = Form(False)):
+    """
+    Streaming variant of select-question: the coach starts speaking the
+    first sentence while the rest of the question is still being generated.
+    
+    Returns the same Server-Sent Events as /respond, preceded by a
+    "question" event with the chosen question; when the theme is exhausted
+    it answers with the plain JSON of select-question instead.
+    """
+    await wait_until_ready()
+    
+    chosen = await _choose_question(session_id, question, random)
+    if isinstance(chosen, dict):
+        return chosen
+    session, question, available, last_exchange = chosen
+    
+    text_stream = stream_next_question(
+        session.current_theme,
+        available,
+        session.asked_questions[:-1],  # Exclude current
+        last_exchange
+    )
+    
+    async def record_question(text: str):
+        session.add_message("assistant", text)
+        await save_session(session, "current_question", "asked_questions", "transcript")
+    
+    async def events():
+        yield _sse({"type": "question", "question": question})
+        async for event in _coach_turn_events(text_stream, "question", record_question):
+            yield event
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"}
+    )
+
+
 # ============ Audio/Chat Routes ============
 
 @app.post("/api/transcribe")
@@ -369,85 +677,350 @@ async def transcribe_audio_endpoint(audio: UploadFile = File(...)):
         raise HTTPException(500, f"Transcription error: {str(e)}")
 
 
+INTERIM_TRANSCRIBE_INTERVAL = 2.0  # seconds between interim transcriptions
+STREAM_IDLE_TIMEOUT = 30.0  # seconds without a frame before the socket is dropped
+MAX_STREAM_AUDIO_BYTES = 25 * 1024 * 1024  # Whisper API upload limit
+INTERIM_WINDOW = 25.0  # seconds of recent audio sent per interim transcription
+
+_WEBM_CLUSTER_ID = b"\x1f\x43\xb6\x75"
+_WEBM_TIMECODE_ID = 0xE7
+
+
+def _webm_clusters(buffer: bytearray, start: int) -> List[int]:
+    """
+    Offsets of the WebM clusters that begin at or after `start`.
+    
+    A cluster is recognized by its ID followed by a size and the Timecode
+    element, so the same 4 bytes inside Opus frames are not mistaken for one.
+    """
+    offsets = []
+    position = buffer.find(_WEBM_CLUSTER_ID, start)
+    while position != -1:
+        size_at = position + len(_WEBM_CLUSTER_ID)
+        if size_at >= len(buffer):
+            break  # the rest of the cluster header has not arrived yet
+        size_length = 9 - buffer[size_at].bit_length()  # EBML variable-length size
+        if size_at + size_length >= len(buffer):
+            break
+        if 1 <= size_length <= 8 and buffer[size_at + size_length] == _WEBM_TIMECODE_ID:
+            offsets.append(position)
+        position = buffer.find(_WEBM_CLUSTER_ID, position + 1)
+    return offsets
+
+
+@app.websocket("/ws/transcribe")
+async def transcribe_stream(websocket: WebSocket):
+    """
+    Transcribe audio while the user is still speaking.
+    
+    The client sends binary chunks of a single WebM recording, then the text
+    message "stop". While audio arrives, its last INTERIM_WINDOW seconds
+    (the WebM header plus the clusters received in that time) are
+    transcribed every few seconds and sent back as {"type": "partial",
+    "confirmed", "text"}; "confirmed" holds the words two consecutive
+    hypotheses over the same window start agree on (LocalAgreement-2).
+    Only the final pass covers the whole recording, so billed audio grows
+    linearly with the answer. After "stop", {"type": "final", "text"} is sent.
+    """
+    await websocket.accept()
+    loop = asyncio.get_running_loop()
+    
+    buffer = bytearray()
+    previous_words: List[str] = []
+    confirmed: List[str] = []
+    interim_task: Optional[asyncio.Task] = None
+    last_interim = loop.time()
+    
+    clusters: List[tuple] = []  # (offset, arrival time) of each cluster received
+    scanned = 0
+    window_start = 0  # offset of the first cluster in the interim window
+    
+    def interim_audio() -> bytes:
+        nonlocal scanned, window_start, previous_words, confirmed
+        for offset in _webm_clusters(buffer, max(0, scanned - len(_WEBM_CLUSTER_ID) - 9)):
+            if not clusters or offset > clusters[-1][0]:
+                clusters.append((offset, loop.time()))
+        scanned = len(buffer)
+        if not clusters:
+            return bytes(buffer)  # still inside the header
+        
+        cutoff = loop.time() - INTERIM_WINDOW
+        start = next((offset for offset, arrived in clusters if arrived >= cutoff), clusters[-1][0])
+        if start != window_start:
+            # New window start: hypotheses over the old one no longer line up word for word
+            window_start = start
+            previous_words, confirmed = [], []
+        return bytes(buffer[:clusters[0][0]]) + bytes(buffer[start:])
+    
+    async def send_interim(audio_bytes: bytes):
+        nonlocal previous_words, confirmed
+        try:
+            words = (await transcribe_audio(audio_bytes, "stream.webm")).split()
+        except Exception as e:
+            logger.warning("⚠️ Interim transcription failed: %s", e)
+            return
+        
+        agreed = []
+        for prev, word in zip(previous_words, words):
+            if prev != word:
+                break
+            agreed.append(word)
+        if len(agreed) > len(confirmed):
+            confirmed = agreed
+        previous_words = words
+        
+        await websocket.send_text(orjson.dumps({
+            "type": "partial",
+            "confirmed": " ".join(confirmed),
+            "text": " ".join(words)
+        }).decode())
+    
+    try:
+        while True:
+            try:
+                message = await asyncio.wait_for(websocket.receive(), timeout=STREAM_IDLE_TIMEOUT)
+            except asyncio.TimeoutError:
+                # Abandoned socket (tab closed without a close frame): drop it and its buffer
+                await websocket.close(code=1001)
+                return
+            if message["type"] == "websocket.disconnect":
+                return
+            
+            if message.get("bytes"):
+                if len(buffer) + len(message["bytes"]) > MAX_STREAM_AUDIO_BYTES:
+                    await websocket.close(code=1009, reason="Recording too long")
+                    return
+                buffer.extend(message["bytes"])
+                now = loop.time()
+                idle = interim_task is None or interim_task.done()
+                if idle and now - last_interim >= INTERIM_TRANSCRIBE_INTERVAL:
+                    last_interim = now
+                    interim_task = asyncio.create_task(send_interim(interim_audio()))
+            elif message.get("text") == "stop":
+                break
+        
+        if interim_task is not None:
+            interim_task.cancel()
+        
+        text = await transcribe_audio(bytes(buffer), "recording.webm") if buffer else ""
+        await websocket.send_text(orjson.dumps({"type": "final", "text": text}).decode())
+    except WebSocketDisconnect:
+        pass
+    finally:
+        if interim_task is not None:
+            interim_task.cancel()
+
+
+_SENTENCE_END = frozenset(".!?…")
+
+
+def _sse(event: Dict) -> bytes:
+    return b"data: " + orjson.dumps(event) + b"\n\n"
+
+
+def _b64(data: bytes) -> bytes:
+    """Base64-encode bytes (SIMD pybase64 when installed, else binascii directly)."""
+    if pybase64 is not None:
+        return pybase64.b64encode(data)
+    return b2a_base64(memoryview(data), newline=False)
+
+
+_AUDIO_EVENT_HEAD = b'data: {"type":"audio_chunk","b64":"'
+_AUDIO_EVENT_TAIL = b'"}\n\n'
+
+
+def _audio_event(audio_bytes: bytes) -> bytes:
+    # Base64 output never needs JSON escaping, so splice it in as bytes
+    # instead of decoding to str and re-encoding the whole payload
+    return b"".join((_AUDIO_EVENT_HEAD, _b64(audio_bytes), _AUDIO_EVENT_TAIL))
+
+
+async def _coach_turn_events(
+    text_stream: AsyncIterator[str],
+    kind: str,
+    on_complete: Callable[[str], Awaitable[None]]
+) -> AsyncIterator[bytes]:
+    """
+    Relay GPT text deltas as SSE events and voice the reply sentence by sentence.
+    
+    TTS for a sentence starts as soon as pysbd sees it is complete, while the
+    rest of the reply is still streaming; audio events keep sentence order.
+    """
+    segmenter = pysbd.Segmenter(language="fr", clean=False)
+    parts: List[str] = []
+    pending = ""
+    tts_tasks: List[asyncio.Task] = []
+    
+    def speak(sentence: str):
+        if sentence.strip():
+            tts_tasks.append(asyncio.create_task(text_to_speech(sentence.strip())))
+    
+    try:
+        async for delta in text_stream:
+            parts.append(delta)
+            pending += delta
+            yield _sse({"type": "text_delta", "content": delta})
+            
+            if any(c in _SENTENCE_END for c in delta):
+                sentences = segmenter.segment(pending)
+                if len(sentences) > 1:
+                    for sentence in sentences[:-1]:
+                        speak(sentence)
+                    pending = sentences[-1]
+            
+            while tts_tasks and tts_tasks[0].done():
+                yield _audio_event(tts_tasks.pop(0).result())
+        
+        speak(pending)
+        while tts_tasks:
+            yield _audio_event(await tts_tasks.pop(0))
+        
+        text = "".join(parts)
+        await on_complete(text)
+        yield _sse({"type": "done", "text": text, "kind": kind})
+    finally:
+        for task in tts_tasks:
+            task.cancel()
+
+
 @app.post("/api/session/{session_id}/respond")
 async def respond_to_session(
     session_id: str,
     user_text: str = Form(...)
 ):
-    """Process user's response and get coach feedback."""
-    session = _sessions.get(session_id)
+    """
+    Process user's response and stream coach feedback.
+    
+    Returns Server-Sent Events: "text_delta" (reply tokens), "audio_chunk"
+    (MP3 of each completed sentence, base64) and a final "done" event with
+    the full text and its kind (feedback, next_question or end).
+    """
+    await wait_until_ready()
+    
+    session = await load_session(session_id)
     if not session:
         raise HTTPException(404, "Session non trouvée")
     
     # Add user response to transcript
-    session.transcript.append({"role": "user", "content": user_text})
+    session.add_message("user", user_text)
+    
+    async def record_reply(text: str, *fields: str):
+        session.add_message("assistant", text)
+        await save_session(session, "transcript", *fields)
     
     # Generate feedback based on mode
     if session.mode == "question_by_question" and session.current_question:
         # Immediate feedback mode
-        feedback = await get_question_feedback(session.current_question, user_text)
-        session.transcript.append({"role": "assistant", "content": feedback})
-        
-        audio_bytes = await text_to_speech(feedback)
-        
-        return {
-            "success": True,
-            "text": feedback,
-            "audio_base64": __import__('base64').b64encode(audio_bytes).decode('utf-8'),
-            "type": "feedback"
-        }
+        events = _coach_turn_events(
+            stream_question_feedback(session.current_question, user_text),
+            "feedback",
+            record_reply
+        )
     else:
         # Full interview mode - just acknowledge and continue
         db = get_questions_db()
         
-        if session.current_theme:
-            available = [q for q in db.get_questions_by_theme(session.current_theme) if q not in session.asked_questions]
+        if session.current_theme in db.get_themes():
+            available = session.available_questions(db.get_questions_by_theme(session.current_theme))
         else:
-            available = [q for q in db.get_all_questions() if q not in session.asked_questions]
+            available = session.available_questions(db.get_all_questions())
         
         if available:
-            next_q = await select_next_question(
+            # Pick the question closest to the answer by embedding similarity
+            # (the first candidate when shortlist falls back). GPT only gets that
+            # one, so it phrases the transition and the tracked question is the
+            # one actually asked.
+            next_question = (await shortlist(user_text, available, k=1))[0]
+            text_stream = stream_next_question(
                 session.current_theme or "Général",
-                available,
+                [next_question],
                 session.asked_questions,
                 {"question": session.current_question, "response": user_text}
             )
-            session.current_question = available[0]  # Track which one was asked
-            session.asked_questions.append(available[0])
-            session.transcript.append({"role": "assistant", "content": next_q})
+            session.current_question = next_question  # Track which one was asked
+            session.mark_asked(next_question)
             
-            audio_bytes = await text_to_speech(next_q)
+            async def record_question(text: str):
+                await record_reply(text, "current_question", "asked_questions")
             
-            return {
-                "success": True,
-                "text": next_q,
-                "audio_base64": __import__('base64').b64encode(audio_bytes).decode('utf-8'),
-                "type": "next_question"
-            }
+            events = _coach_turn_events(text_stream, "next_question", record_question)
         else:
             # No more questions
-            return {
-                "success": True,
-                "text": "On a fait le tour ! Tu veux faire le débrief ?",
-                "audio_base64": __import__('base64').b64encode(
-                    await text_to_speech("On a fait le tour ! Tu veux faire le débrief ?")
-                ).decode('utf-8'),
-                "type": "end"
-            }
+            await save_session(session, "transcript")
+            
+            async def end_events():
+                yield _sse({"type": "text_delta", "content": ALL_QUESTIONS_DONE_TEXT})
+                audio_bytes = app.state.static_audio.get(ALL_QUESTIONS_DONE_TEXT)
+                if audio_bytes is None:
+                    audio_bytes = await text_to_speech(ALL_QUESTIONS_DONE_TEXT)
+                yield _audio_event(audio_bytes)
+                yield _sse({"type": "done", "text": ALL_QUESTIONS_DONE_TEXT, "kind": "end"})
+            
+            events = end_events()
+    
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"}
+    )
+
+
+async def speech_url(text: str) -> str:
+    """
+    URL the frontend can use as an <audio> source to stream the coach's voice.
+    
+    The text stays server-side behind a short-lived random key, so the URL
+    cannot be forged into paid TTS for arbitrary text and keeps long replies
+    out of access logs.
+    """
+    return f"/api/speak/{await store_speech_text(text)}"
+
+
+def _tts_cache_key(text: str, voice: str = "nova") -> str:
+    return f"tts:{hashlib.sha256(f'{voice}:{text}'.encode('utf-8')).hexdigest()}"
+
+
+async def _stream_and_cache(text: str, key: str):
+    """Stream TTS chunks to the client, then cache the full MP3 in Redis."""
+    chunks = []
+    async for chunk in stream_speech(text):
+        chunks.append(chunk)
+        yield chunk
+    await get_redis().set(key, b"".join(chunks), nx=True, ex=TTS_CACHE_TTL)
+
+
+async def _speech_response(text: str) -> Response:
+    """Serve cached audio if we have it, otherwise stream MP3 chunks from OpenAI TTS."""
+    headers = {"Content-Disposition": "inline; filename=speech.mp3"}
+    
+    audio_bytes = app.state.static_audio.get(text)
+    if audio_bytes is not None:
+        return Response(content=audio_bytes, media_type="audio/mpeg", headers=headers)
+    
+    redis = get_redis()
+    if redis is None:
+        return StreamingResponse(stream_speech(text), media_type="audio/mpeg", headers=headers)
+    
+    key = _tts_cache_key(text)
+    audio_bytes = await redis.get(key)
+    if audio_bytes is not None:
+        return Response(content=audio_bytes, media_type="audio/mpeg", headers=headers)
+    return StreamingResponse(_stream_and_cache(text, key), media_type="audio/mpeg", headers=headers)
+
+
+@app.get("/api/speak/{key}")
+async def stream_text(key: str):
+    """Stream the text behind a speech_url() key as speech (usable directly as an audio src)."""
+    text = await load_speech_text(key)
+    if text is None:
+        raise HTTPException(404, "Audio expiré")
+    return await _speech_response(text)
 
 
 @app.post("/api/speak")
 async def speak_text(text: str = Form(...)):
     """Convert text to speech."""
-    try:
-        audio_bytes = await text_to_speech(text)
-        return Response(
-            content=audio_bytes,
-            media_type="audio/mpeg",
-            headers={"Content-Disposition": "attachment; filename=speech.mp3"}
-        )
-    except Exception as e:
-        raise HTTPException(500, f"TTS error: {str(e)}")
+    return await _speech_response(text)
 
 
 # ============ Debrief Routes ============
@@ -455,7 +1028,7 @@ async def speak_text(text: str = Form(...)):
 @app.post("/api/session/{session_id}/debrief")
 async def get_session_debrief(session_id: str):
     """Generate the final debrief for a session."""
-    session = _sessions.get(session_id)
+    session = await load_session(session_id)
     if not session:
         raise HTTPException(404, "Session non trouvée")
     
@@ -472,13 +1045,11 @@ async def get_session_debrief(session_id: str):
         if debrief.get("prochain_objectif"):
             summary_text += f"Pour ta prochaine session, concentre-toi sur : {debrief['prochain_objectif']}"
         
-        audio_bytes = await text_to_speech(summary_text)
-        
         return {
             "success": True,
             "debrief": debrief,
             "summary_text": summary_text,
-            "audio_base64": __import__('base64').b64encode(audio_bytes).decode('utf-8')
+            "audio_url": await speech_url(summary_text)
         }
     except Exception as e:
         raise HTTPException(500, f"Debrief error: {str(e)}")
@@ -487,7 +1058,7 @@ async def get_session_debrief(session_id: str):
 @app.get("/api/session/{session_id}/transcript")
 async def get_session_transcript(session_id: str):
     """Get the raw transcript of a session."""
-    session = _sessions.get(session_id)
+    session = await load_session(session_id)
     if not session:
         raise HTTPException(404, "Session non trouvée")
     
@@ -510,7 +1081,7 @@ async def get_session_transcript(session_id: str):
 async def admin_rescrape():
     """Force a rescrape of pineurs.com."""
     try:
-        content = force_rescrape()
+        content = await force_rescrape_async()
         return {
             "success": True,
             "message": "Rescrape completed",
@@ -521,11 +1092,26 @@ async def admin_rescrape():
 
 
 @app.post("/admin/recategorize")
-async def admin_recategorize():
-    """Force recategorization of questions."""
+async def admin_recategorize(batch: bool = False):
+    """
+    Force recategorization of questions.
+    
+    With ?batch=true the job is submitted to the OpenAI Batch API (half the
+    cost, no impact on live rate limits) and themes are replaced whenever it
+    completes; the current themes keep being served meanwhile.
+    """
+    await wait_until_ready()
+    
+    if batch:
+        task = getattr(app.state, "categorize_task", None)
+        if task is None or task.done():
+            app.state.categorize_task = asyncio.create_task(_categorize_in_batch())
+        return {"success": True, "status": "submitted"}
+    
     try:
         db = get_questions_db()
         await db.categorize_with_ai()
+        _json_cache.clear()
         return {
             "success": True,
             "themes": db.get_themes_with_counts()
@@ -534,34 +1120,80 @@ async def admin_recategorize():
         raise HTTPException(500, f"Recategorize failed: {str(e)}")
 
 
+async def _categorize_in_batch():
+    """Background Batch API recategorization."""
+    await get_questions_db().categorize_with_ai(interactive=False)
+    _json_cache.clear()
+    logger.info("✅ Batch recategorization finished")
+
+
+@app.post("/admin/sessions/gc")
+async def admin_sessions_gc():
+    """Evict expired in-memory sessions now (Redis expires keys on its own)."""
+    return {"success": True, **gc_sessions()}
+
+
 @app.get("/admin/context")
-async def admin_get_context():
-    """Get the current master context."""
-    context = load_context()
-    return {
+async def admin_get_context(request: Request):
+    """Get the current master context (304 when the client's ETag still matches)."""
+    info = get_master_context_info()
+    headers = {"ETag": info["etag"], "Cache-Control": "public, max-age=3600"}
+    
+    if request.headers.get("if-none-match") == info["etag"]:
+        return Response(status_code=304, headers=headers)
+    
+    return ORJSONResponse({
         "success": True,
-        "context": context,
-        "text_preview": get_master_context_text()[:1000]
-    }
+        "context": await load_context_async(),
+        "text_preview": info["preview"]
+    }, headers=headers)
 
 
 # ============ Health Check ============
 
 @app.get("/health")
 async def health_check():
-    """Health check endpoint."""
+    """Health check endpoint (answers immediately, even while starting up)."""
+    if not app.state.ready.is_set():
+        return {
+            "status": "starting",
+            "service": "X-HEC Interview Coach v3.0",
+            "openai_configured": bool(os.environ.get("OPENAI_API_KEY"))
+        }
+    
     db = get_questions_db()
-    return {
+    return cached_json("health", lambda: {
         "status": "healthy",
         "service": "X-HEC Interview Coach v3.0",
         "openai_configured": bool(os.environ.get("OPENAI_API_KEY")),
         "questions_loaded": db.get_questions_count(),
         "themes_loaded": db.has_themes()
-    }
+    })
+
+
+@app.get("/ready")
+async def readiness_check():
+    """Readiness probe: 503 until questions are loaded and the context refresh is done."""
+    scrape_done = app.state.scrape_task.done()
+    ready = app.state.ready.is_set() and scrape_done
+    return ORJSONResponse(
+        {"ready": ready, "initialized": app.state.ready.is_set(), "context_refreshed": scrape_done},
+        status_code=200 if ready else 503
+    )
 
 
 # ============ Run with uvicorn ============
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # Each worker runs its own startup; shared state lives in Redis (REDIS_URL)
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=8000,
+        workers=web_workers(),
+        loop="uvloop",
+        http="httptools",
+        ws="websockets",
+        ws_per_message_deflate=False  # audio frames are incompressible
+    )
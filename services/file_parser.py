@@ -1,36 +1,136 @@
 """File parsing utilities for CV (PDF) and Questions (Excel)."""
 
 import io
-from typing import Tuple
-import pandas as pd
-from PyPDF2 import PdfReader
+import re
+import asyncio
+import hashlib
+import functools
+import threading
+from collections import OrderedDict
+from typing import IO, List, Optional, Tuple, Union
+import pypdfium2 as pdfium
+from python_calamine import CalamineWorkbook
 
+try:
+    import polars as pl
+except ImportError:
+    pl = None
 
-def parse_pdf(file_content: bytes) -> str:
+# PDFium is not thread-safe: serialize calls made from the threadpool fallback
+_pdfium_lock = threading.Lock()
+
+PARSE_CACHE_SIZE = 64
+COLUMNAR_EXCEL_MIN_BYTES = 1024 * 1024  # above this, use polars (if installed)
+
+# Common CV keywords, matched in one case-insensitive pass
+_CV_KEYWORDS_RE = re.compile(
+    r"exp[ée]rience|formation|education|comp[ée]tence|skill|projet|project",
+    re.IGNORECASE
+)
+
+
+def content_digest(file_content: bytes) -> bytes:
+    """Cache key for an uploaded file (blake2b: fast, and collision-safe for this)."""
+    return hashlib.blake2b(file_content, digest_size=16).digest()
+
+
+def cached_by_content(func):
+    """
+    Memoize a parser on the hash of its bytes argument (LRU, PARSE_CACHE_SIZE entries).
+    
+    Only for parsers called in the web process: the PDF parsers run in the
+    process pool, where a per-child cache would rarely hit and would multiply
+    memory, so uploads are cached by main._parsed_dossiers instead.
+    
+    Re-uploads of the same file skip parsing entirely. File-like arguments are
+    not cached. Cached results are shared between callers: do not mutate them.
+    """
+    cache: OrderedDict = OrderedDict()
+    lock = threading.Lock()
+    
+    @functools.wraps(func)
+    def wrapper(file_content, *args):
+        if not isinstance(file_content, bytes):
+            return func(file_content, *args)
+        
+        key = (content_digest(file_content), args)
+        with lock:
+            if key in cache:
+                cache.move_to_end(key)
+                return cache[key]
+        
+        result = func(file_content, *args)
+        with lock:
+            cache[key] = result
+            if len(cache) > PARSE_CACHE_SIZE:
+                cache.popitem(last=False)
+        return result
+    
+    return wrapper
+
+
+def parse_pdf(file_content: Union[bytes, IO[bytes]]) -> str:
     """
     Extract text content from a PDF file.
     
     Args:
-        file_content: Raw bytes of the PDF file
+        file_content: Raw bytes of the PDF file, or a seekable binary file
         
     Returns:
         Extracted text content
     """
-    try:
-        pdf_file = io.BytesIO(file_content)
-        reader = PdfReader(pdf_file)
-        
-        text_parts = []
-        for page in reader.pages:
-            page_text = page.extract_text()
-            if page_text:
-                text_parts.append(page_text)
+    return join_pdf_pages([extract_pdf_pages(file_content)])
+
+
+def extract_pdf_pages(file_content: Union[bytes, IO[bytes]], start: int = 0, step: int = 1) -> List[str]:
+    """
+    Extract the text of pages start, start+step, start+2*step, ...
+    
+    Lets several processes share one document (PDFium cannot be used from
+    several threads); empty pages are kept so join_pdf_pages can reorder.
+    """
+    with _pdfium_lock:
+        try:
+            pdf = pdfium.PdfDocument(file_content)
+        except Exception as e:
+            raise ValueError(f"Erreur lors de la lecture du PDF: {str(e)}")
         
-        return "\n\n".join(text_parts)
-    except Exception as e:
-        raise ValueError(f"Erreur lors de la lecture du PDF: {str(e)}")
+        try:
+            page_texts = []
+            for i in range(start, len(pdf), step):
+                page = pdf[i]
+                textpage = page.get_textpage()
+                page_texts.append(textpage.get_text_range())
+                # Release PDFium's native memory as we go instead of at GC time
+                textpage.close()
+                page.close()
+            
+            return page_texts
+        except Exception as e:
+            raise ValueError(f"Erreur lors de la lecture du PDF: {str(e)}")
+        finally:
+            pdf.close()
 
 
+def join_pdf_pages(strided_pages: List[List[str]]) -> str:
+    """Merge extract_pdf_pages results (one per start offset) back into document order."""
+    step = len(strided_pages)
+    total = sum(len(pages) for pages in strided_pages)
+    ordered = (strided_pages[i % step][i // step] for i in range(total))
+    return "\n\n".join(text for text in ordered if text)
+
+
+def _cell_text(row: list, idx: int) -> str:
+    """Stripped text of a cell; empty for missing or blank cells."""
+    if idx >= len(row) or row[idx] is None:
+        return ""
+    value = row[idx]
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+@cached_by_content
 def parse_excel_questions(file_content: bytes) -> Tuple[list[str], dict[str, str]]:
     """
     Parse an Excel file containing interview questions and user answers.
@@ -47,41 +147,29 @@ def parse_excel_questions(file_content: bytes) -> Tuple[list[str], dict[str, str
         Tuple of (list of questions, dict mapping questions to answers)
     """
     try:
-        excel_file = io.BytesIO(file_content)
-        df = pd.read_excel(excel_file)
-        
-        # Normalize column names
-        df.columns = df.columns.str.lower().str.strip()
-        
-        # Find question column
-        question_col = None
-        for col in ['question', 'questions', 'q']:
-            if col in df.columns:
-                question_col = col
-                break
+        if pl is not None and len(file_content) >= COLUMNAR_EXCEL_MIN_BYTES:
+            return _parse_excel_columnar(file_content)
         
-        if question_col is None:
-            # Try first column as questions
-            question_col = df.columns[0]
+        # Question lists are usually small: read the first sheet's rows
+        # directly instead of building a DataFrame with dtype inference
+        workbook = CalamineWorkbook.from_filelike(io.BytesIO(file_content))
+        rows = workbook.get_sheet_by_index(0).to_python(skip_empty_area=False)
+        if not rows:
+            return [], {}
         
-        # Find answer column
-        answer_col = None
-        for col in ['reponse', 'réponse', 'reponses', 'réponses', 'answer', 'answers', 'r']:
-            if col in df.columns:
-                answer_col = col
-                break
+        question_idx, answer_idx = _find_question_columns(rows[0])
         
-        # Extract questions
-        questions = df[question_col].dropna().astype(str).tolist()
-        questions = [q.strip() for q in questions if q.strip()]
-        
-        # Extract answers if available
+        # Extract questions and, if available, answers in one pass
+        questions = []
         answers = {}
-        if answer_col:
-            for _, row in df.iterrows():
-                q = str(row[question_col]).strip() if pd.notna(row[question_col]) else ""
-                a = str(row[answer_col]).strip() if pd.notna(row.get(answer_col)) else ""
-                if q and a:
+        for row in rows[1:]:
+            q = _cell_text(row, question_idx)
+            if not q:
+                continue
+            questions.append(q)
+            if answer_idx is not None:
+                a = _cell_text(row, answer_idx)
+                if a:
                     answers[q] = a
         
         return questions, answers
@@ -90,6 +178,66 @@ def parse_excel_questions(file_content: bytes) -> Tuple[list[str], dict[str, str
         raise ValueError(f"Erreur lors de la lecture du fichier Excel: {str(e)}")
 
 
+def _find_question_columns(header_row: list) -> Tuple[int, Optional[int]]:
+    """Index of the question column (first column by default) and of the answer column, if any."""
+    # Normalize column names
+    header = [str(cell).lower().strip() for cell in header_row]
+    
+    # Find question column
+    question_idx = 0  # Try first column as questions by default
+    for col in ['question', 'questions', 'q']:
+        if col in header:
+            question_idx = header.index(col)
+            break
+    
+    # Find answer column
+    answer_idx = None
+    for col in ['reponse', 'réponse', 'reponses', 'réponses', 'answer', 'answers', 'r']:
+        if col in header:
+            answer_idx = header.index(col)
+            break
+    
+    return question_idx, answer_idx
+
+
+def _parse_excel_columnar(file_content: bytes) -> Tuple[list[str], dict[str, str]]:
+    """parse_excel_questions for large banks: polars reads and filters whole columns in Rust."""
+    df = pl.read_excel(io.BytesIO(file_content), engine="calamine")
+    if df.width == 0:
+        return [], {}
+    
+    question_idx, answer_idx = _find_question_columns(df.columns)
+    
+    def text_column(idx: int) -> pl.Expr:
+        return pl.col(df.columns[idx]).cast(pl.Utf8).str.strip_chars()
+    
+    q = df.select(text_column(question_idx).alias("q")).get_column("q")
+    questions = q.filter(q.is_not_null() & (q != "")).to_list()
+    
+    answers = {}
+    if answer_idx is not None:
+        pairs = df.select(
+            text_column(question_idx).alias("q"),
+            text_column(answer_idx).alias("a")
+        ).filter(
+            pl.col("q").is_not_null() & (pl.col("q") != "")
+            & pl.col("a").is_not_null() & (pl.col("a") != "")
+        )
+        answers = dict(zip(pairs.get_column("q").to_list(), pairs.get_column("a").to_list()))
+    
+    return questions, answers
+
+
+async def parse_pdf_async(file_content: Union[bytes, IO[bytes]]) -> str:
+    """parse_pdf in a worker thread, for async handlers that must not block the event loop."""
+    return await asyncio.to_thread(parse_pdf, file_content)
+
+
+async def parse_excel_questions_async(file_content: bytes) -> Tuple[list[str], dict[str, str]]:
+    """parse_excel_questions in a worker thread, for async handlers."""
+    return await asyncio.to_thread(parse_excel_questions, file_content)
+
+
 def validate_cv(cv_text: str) -> bool:
     """
     Basic validation that the CV contains meaningful content.
@@ -104,11 +252,7 @@ def validate_cv(cv_text: str) -> bool:
         return False
     
     # Check for common CV keywords
-    keywords = ['expérience', 'experience', 'formation', 'education', 
-                'compétence', 'skill', 'projet', 'project']
-    cv_lower = cv_text.lower()
-    
-    return any(kw in cv_lower for kw in keywords)
+    return _CV_KEYWORDS_RE.search(cv_text) is not None
 
 
 def validate_questions(questions: list[str]) -> bool:
@@ -1,21 +1,38 @@
 """Mistral AI agent for interview coaching."""
 
 import os
-from typing import Optional
+import asyncio
+import hashlib
+from functools import lru_cache
+from itertools import islice
+from typing import AsyncIterator, Awaitable, Callable, Optional
 
+import httpx
 from mistralai import Mistral
 
 from prompts.coach_prompt import (
-    COACH_SYSTEM_PROMPT,
+    COACH_STATIC_PREAMBLE,
+    COACH_DYNAMIC_SUFFIX,
     FEEDBACK_IMMEDIATE_PROMPT,
     FEEDBACK_GLOBAL_PROMPT,
     QUESTION_INTRO_PROMPT,
     NEXT_QUESTION_PROMPT
 )
 from services.scraper import get_master_context_text
+from services.response_cache import ResponseCache
 from services.session import Session, SessionMode
 
 
+# Receives each text delta as Mistral streams it (e.g. to forward it to the UI)
+DeltaCallback = Callable[[str], Awaitable[None]]
+
+
+@lru_cache(maxsize=1)
+def _static_system_prefix(master_context: str) -> str:
+    """Static preamble + master context; rebuilt only when the context changes."""
+    return COACH_STATIC_PREAMBLE.format(master_context=master_context)
+
+
 class InterviewCoach:
     """Mistral-powered interview coach for X-HEC candidates."""
     
@@ -24,28 +41,69 @@ class InterviewCoach:
         if not api_key:
             raise ValueError("MISTRAL_API_KEY environment variable not set")
         
-        self.client = Mistral(api_key=api_key)
+        # One keep-alive HTTP/2 pool for every call made by this coach;
+        # all calls go through the SDK's *_async methods
+        self.client = Mistral(
+            api_key=api_key,
+            async_client=httpx.AsyncClient(
+                http2=True,
+                timeout=httpx.Timeout(60.0, connect=10.0),
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=50)
+            )
+        )
         self.model = "mistral-large-latest"
+        
+        # Rehearsed answers are often near-identical; reuse feedback for them
+        self.feedback_cache = ResponseCache()
     
     def _build_system_prompt(self, session: Session) -> str:
-        """Build the full system prompt with context."""
+        """
+        Build the full system prompt with context.
+        
+        The result is memoized on the session and rebuilt only when the master
+        context, the CV or the user answers are replaced (they are not edited
+        in place), so every turn sends a byte-identical prefix.
+        """
         master_context = get_master_context_text()
+        inputs = (master_context, session.cv_content, session.user_answers)
+        cached = session._system_prompt_inputs
+        if cached is not None and all(a is b for a, b in zip(cached, inputs)):
+            return session._system_prompt
         
         # Format user answers
-        user_answers_text = "\n".join([
-            f"Q: {q}\nR: {a}" 
+        user_answers_text = "\n".join(
+            f"Q: {q}\nR: {a}"
             for q, a in session.user_answers.items()
-        ]) if session.user_answers else "Aucune réponse préparée fournie."
+        ) if session.user_answers else "Aucune réponse préparée fournie."
         
-        return COACH_SYSTEM_PROMPT.format(
-            master_context=master_context,
+        # Shared prefix first so Mistral can reuse it across candidates
+        session._system_prompt = _static_system_prefix(master_context) + COACH_DYNAMIC_SUFFIX.format(
             cv_content=session.cv_content,
             user_answers=user_answers_text
         )
+        session._system_prompt_inputs = inputs
+        return session._system_prompt
     
-    def _chat(self, system_prompt: str, user_message: str) -> str:
-        """Send a chat message to Mistral."""
-        response = self.client.chat.complete(
+    async def _chat(
+        self,
+        system_prompt: str,
+        user_message: str,
+        on_delta: Optional[DeltaCallback] = None
+    ) -> str:
+        """
+        Send a chat message to Mistral.
+        
+        With on_delta, the answer is streamed and each delta is passed to it
+        as soon as it arrives; the full text is still returned at the end.
+        """
+        if on_delta is not None:
+            parts = []
+            async for delta in self._chat_stream(system_prompt, user_message):
+                parts.append(delta)
+                await on_delta(delta)
+            return "".join(parts)
+        
+        response = await self.client.chat.complete_async(
             model=self.model,
             messages=[
                 {"role": "system", "content": system_prompt},
@@ -54,23 +112,43 @@ class InterviewCoach:
         )
         return response.choices[0].message.content
     
-    def _chat_with_history(self, system_prompt: str, messages: list[dict]) -> str:
+    async def _chat_stream(self, system_prompt: str, user_message: str) -> AsyncIterator[str]:
+        """Stream the text deltas of a Mistral chat completion."""
+        stream = await self.client.chat.stream_async(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_message}
+            ]
+        )
+        async for event in stream:
+            delta = event.data.choices[0].delta.content if event.data.choices else None
+            if delta:
+                yield delta
+    
+    async def _chat_with_history(self, system_prompt: str, messages: list[dict]) -> str:
         """Send a chat with message history to Mistral."""
         full_messages = [{"role": "system", "content": system_prompt}] + messages
         
-        response = self.client.chat.complete(
+        response = await self.client.chat.complete_async(
             model=self.model,
             messages=full_messages
         )
         return response.choices[0].message.content
     
-    def start_interview(self, session: Session, presentation: str) -> str:
+    async def start_interview(
+        self,
+        session: Session,
+        presentation: str,
+        on_delta: Optional[DeltaCallback] = None
+    ) -> str:
         """
         Start the interview after the candidate's presentation.
         
         Args:
             session: The coaching session
             presentation: Candidate's oral presentation
+            on_delta: Optional callback receiving the answer as it streams
             
         Returns:
             Coach's response with first question
@@ -81,16 +159,22 @@ class InterviewCoach:
         system_prompt = self._build_system_prompt(session)
         
         # Get remaining questions
-        questions_text = "\n".join([f"- {q}" for q in session.questions_list])
+        questions_text = "\n".join(f"- {q}" for q in session.questions_list)
         
         prompt = QUESTION_INTRO_PROMPT.format(
             presentation=presentation,
             questions_list=questions_text
         )
         
-        return self._chat(system_prompt, prompt)
+        return await self._chat(system_prompt, prompt, on_delta)
     
-    def process_response_mode1(self, session: Session, question: str, response: str) -> str:
+    async def process_response_mode1(
+        self,
+        session: Session,
+        question: str,
+        response: str,
+        on_delta: Optional[DeltaCallback] = None
+    ) -> str:
         """
         Process a response in Mode 1 (question by question with immediate feedback).
         
@@ -98,18 +182,29 @@ class InterviewCoach:
             session: The coaching session
             question: The question that was asked
             response: Candidate's response
+            on_delta: Optional callback receiving the feedback as it streams
             
         Returns:
             Immediate feedback
         """
         system_prompt = self._build_system_prompt(session)
-        
-        prompt = FEEDBACK_IMMEDIATE_PROMPT.format(
-            question=question,
-            response=response
-        )
-        
-        feedback = self._chat(system_prompt, prompt)
+        # The prompt carries the candidate's CV and answers: feedback is only
+        # reused for the same dossier, never across candidates
+        prompt_digest = hashlib.blake2b(system_prompt.encode("utf-8"), digest_size=16).hexdigest()
+        cache_scope = f"mistral:{prompt_digest}:{question}"
+        # SQLite and embedding lookups block, keep them off the event loop
+        feedback = await asyncio.to_thread(self.feedback_cache.get, cache_scope, response)
+        
+        if feedback is None:
+            prompt = FEEDBACK_IMMEDIATE_PROMPT.format(
+                question=question,
+                response=response
+            )
+            
+            feedback = await self._chat(system_prompt, prompt, on_delta)
+            await asyncio.to_thread(self.feedback_cache.put, cache_scope, response, feedback)
+        elif on_delta is not None:
+            await on_delta(feedback)
         
         # Store the exchange
         session.add_exchange(question, response, feedback)
@@ -128,12 +223,17 @@ class InterviewCoach:
         # Just store the exchange without feedback
         session.add_exchange(question, response, feedback=None)
     
-    def get_next_question(self, session: Session) -> Optional[str]:
+    async def get_next_question(
+        self,
+        session: Session,
+        on_delta: Optional[DeltaCallback] = None
+    ) -> Optional[str]:
         """
         Get the next question from the coach.
         
         Args:
             session: The coaching session
+            on_delta: Optional callback receiving the question as it streams
             
         Returns:
             Next question or None if no more questions
@@ -147,13 +247,10 @@ class InterviewCoach:
         last_exchange = session.exchanges[-1]
         
         # Get remaining questions
-        asked_questions = {e.question for e in session.exchanges}
-        remaining = [q for q in session.questions_list if q not in asked_questions]
-        
-        if not remaining:
+        if not session.remaining_questions:
             return None
         
-        remaining_text = "\n".join([f"- {q}" for q in remaining[:5]])  # Limit to 5
+        remaining_text = "\n".join(f"- {q}" for q in islice(session.remaining_questions, 5))  # Limit to 5
         
         feedback_text = ""
         if session.mode == SessionMode.QUESTION_BY_QUESTION and last_exchange.feedback:
@@ -166,62 +263,69 @@ class InterviewCoach:
             remaining_questions=remaining_text
         )
         
-        return self._chat(system_prompt, prompt)
+        return await self._chat(system_prompt, prompt, on_delta)
     
-    def generate_final_summary(self, session: Session) -> str:
+    async def generate_final_summary(
+        self,
+        session: Session,
+        on_delta: Optional[DeltaCallback] = None
+    ) -> str:
         """
         Generate the final summary/debrief for Mode 2.
         
         Args:
             session: The coaching session
+            on_delta: Optional callback receiving the debrief as it streams
             
         Returns:
             Complete debrief text
         """
         system_prompt = self._build_system_prompt(session)
         
-        # Format all exchanges
-        exchanges_text = []
-        for i, exchange in enumerate(session.exchanges, 1):
-            exchanges_text.append(f"Question {i}: {exchange.question}")
-            exchanges_text.append(f"Réponse: {exchange.response}")
-            exchanges_text.append("")
+        # Format all exchanges in a single join
+        exchanges_text = "\n".join(
+            f"Question {i}: {exchange.question}\nRéponse: {exchange.response}\n"
+            for i, exchange in enumerate(session.exchanges, 1)
+        )
         
         prompt = FEEDBACK_GLOBAL_PROMPT.format(
-            all_exchanges="\n".join(exchanges_text)
+            all_exchanges=exchanges_text
         )
         
-        summary = self._chat(system_prompt, prompt)
+        summary = await self._chat(system_prompt, prompt, on_delta)
         session.final_summary = summary
         
         return summary
     
-    def generate_session_summary(self, session: Session) -> str:
+    async def generate_session_summary(
+        self,
+        session: Session,
+        on_delta: Optional[DeltaCallback] = None
+    ) -> str:
         """
         Generate a summary for Mode 1 (at the end of question-by-question).
         
         Args:
             session: The coaching session
+            on_delta: Optional callback receiving the summary as it streams
             
         Returns:
             Session summary
         """
         if session.mode == SessionMode.FULL_INTERVIEW:
-            return self.generate_final_summary(session)
+            return await self.generate_final_summary(session, on_delta)
         
         # For Mode 1, generate a lighter summary
         system_prompt = self._build_system_prompt(session)
         
-        exchanges_text = []
-        for i, exchange in enumerate(session.exchanges, 1):
-            exchanges_text.append(f"Q{i}: {exchange.question}")
-            exchanges_text.append(f"R: {exchange.response}")
-            exchanges_text.append(f"Feedback: {exchange.feedback or 'N/A'}")
-            exchanges_text.append("")
+        exchanges_text = "\n".join(
+            f"Q{i}: {exchange.question}\nR: {exchange.response}\nFeedback: {exchange.feedback or 'N/A'}\n"
+            for i, exchange in enumerate(session.exchanges, 1)
+        )
         
         prompt = f"""Voici le résumé de la session d'entraînement :
 
-{chr(10).join(exchanges_text)}
+{exchanges_text}
 
 Génère un bref résumé de fin de session (5-6 lignes max) avec :
 - Les points forts de cette session
@@ -230,7 +334,7 @@ Génère un bref résumé de fin de session (5-6 lignes max) avec :
 
 Sois concis et actionnable."""
         
-        summary = self._chat(system_prompt, prompt)
+        summary = await self._chat(system_prompt, prompt, on_delta)
         session.final_summary = summary
         
         return summary
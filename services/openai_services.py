@@ -3,18 +3,167 @@ OpenAI Services - Whisper, GPT-4, TTS for sequential voice flow.
 """
 
 import os
-import json
-from typing import List, Dict, Optional
-from openai import OpenAI
+import io
+import wave
+import logging
+import asyncio
+import functools
+import time
+from collections import defaultdict
+from typing import List, Dict, Optional, AsyncIterator, Awaitable, Iterable, TypeVar
 
-# Initialize OpenAI client
-client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
+import httpx
+import orjson
+from openai import AsyncOpenAI, APIConnectionError, APITimeoutError, InternalServerError, RateLimitError
+from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_random_exponential
+
+from services.response_cache import ResponseCache
+from services.throttle import RateLimiter, estimate_call_tokens, estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Feedback and intros already generated, reused across sessions and restarts
+_response_cache = ResponseCache()
+INTRO_CACHE_SCOPE = "coach_intro"
+
+# Shared OpenAI client, created on first use (or at startup by init_client())
+client: Optional[AsyncOpenAI] = None
+
+# Caps in-flight OpenAI requests so bursts queue here instead of hitting 429s
+_semaphore: Optional[asyncio.Semaphore] = None
+
+# Account-wide request/token budget, set when OPENAI_RPM and OPENAI_TPM are configured
+_limiter: Optional[RateLimiter] = None
+
+# Errors worth another attempt: rate limits and transient network / 5xx failures
+RETRYABLE_ERRORS = (RateLimitError, APIConnectionError, APITimeoutError, InternalServerError)
+
+
+# Model tiers, each overridable from the environment
+DEFAULT_MODELS = {
+    "OPENAI_CHAT_MODEL": "gpt-4o",
+    "OPENAI_FAST_CHAT_MODEL": "gpt-4o-mini",  # short per-turn feedback / next question
+    "OPENAI_STT_MODEL": "gpt-4o-mini-transcribe",
+    "OPENAI_TTS_MODEL": "tts-1",
+}
+
+
+def _model(setting: str) -> str:
+    """Model name for a tier (read per call, like STT_BACKEND, so .env is honored)."""
+    return os.environ.get(setting, DEFAULT_MODELS[setting])
+
+
+def init_client() -> AsyncOpenAI:
+    """
+    Create the shared AsyncOpenAI client with a pooled keep-alive HTTP client.
+    
+    Reusing one client across requests avoids a new TCP+TLS handshake
+    to api.openai.com for every chat/TTS/Whisper call.
+    """
+    global client, _semaphore, _limiter
+    if _semaphore is None:
+        _semaphore = asyncio.Semaphore(int(os.environ.get("OPENAI_MAX_CONCURRENCY", "16")))
+    if _limiter is None and os.environ.get("OPENAI_RPM") and os.environ.get("OPENAI_TPM"):
+        _limiter = RateLimiter(int(os.environ["OPENAI_RPM"]), int(os.environ["OPENAI_TPM"]))
+    if client is None:
+        # Pool size is tunable per deployment without a code change
+        max_connections = int(os.environ.get("OPENAI_MAX_CONNECTIONS", "100"))
+        max_keepalive = int(os.environ.get("OPENAI_MAX_KEEPALIVE", str(max(1, max_connections // 2))))
+        client = AsyncOpenAI(
+            api_key=os.environ.get("OPENAI_API_KEY"),
+            http_client=httpx.AsyncClient(
+                http2=True,  # multiplex concurrent chat/TTS/STT streams on one connection
+                timeout=httpx.Timeout(60.0, connect=5.0),
+                limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive)
+            )
+        )
+    return client
+
+
+def _get_client() -> AsyncOpenAI:
+    """The shared client, created on first use so importing this module stays cheap."""
+    return client if client is not None else init_client()
+
+
+def _get_semaphore() -> asyncio.Semaphore:
+    """The shared concurrency limit (created along with the client)."""
+    if _semaphore is None:
+        init_client()
+    return _semaphore
+
+
+async def close_client():
+    """Close the shared OpenAI client and its connection pool."""
+    global client
+    if client is not None:
+        await client.close()
+        client = None
+
+
+def _silent_wav(seconds: float = 1.0, rate: int = 16000) -> bytes:
+    """Build a mono 16-bit PCM WAV of silence."""
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(b"\x00\x00" * int(seconds * rate))
+    return buffer.getvalue()
+
+
+SILENT_WAV_BYTES = _silent_wav()
+
+
+async def warm_up():
+    """
+    Send a throwaway transcription so the first user request does not pay
+    for opening connections to the Whisper endpoint (or loading the local model).
+    """
+    await transcribe_audio(SILENT_WAV_BYTES, "warmup.wav")
+
+
+async def _throttle(tokens: int):
+    """Wait for the request/token budget (no-op when no budget is configured)."""
+    if _limiter is not None:
+        await _limiter.acquire(tokens)
+
+
+# Jittered exponential backoff on rate limits and transient failures
+_retry_transient = retry(
+    retry=retry_if_exception_type(RETRYABLE_ERRORS),
+    wait=wait_random_exponential(multiplier=1, max=30),
+    stop=stop_after_attempt(6),
+    reraise=True
+)
+
+
+def openai_call(func):
+    """
+    Decorator for OpenAI-backed coroutines.
+    
+    Each attempt first waits for the request/token budget (estimated from
+    the call's text arguments), then holds a concurrency slot. Rate-limited
+    and transient failures are retried with jittered exponential backoff
+    after releasing their slot.
+    """
+    @_retry_transient
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        await _throttle(estimate_call_tokens(*args, **kwargs))
+        async with _get_semaphore():
+            return await func(*args, **kwargs)
+    return wrapper
 
 
 async def transcribe_audio(audio_bytes: bytes, filename: str = "audio.webm") -> str:
     """
     Transcribe audio using Whisper.
     
+    The backend is chosen by STT_BACKEND: "openai" (default, Whisper API)
+    or "faster_whisper" (local model, see services/stt_faster.py).
+    
     Args:
         audio_bytes: Raw audio bytes (webm, mp3, wav, etc.)
         filename: Filename hint for format detection
@@ -22,20 +171,66 @@ async def transcribe_audio(audio_bytes: bytes, filename: str = "audio.webm") ->
     Returns:
         Transcribed text
     """
-    import io
+    if os.environ.get("STT_BACKEND", "openai") == "faster_whisper":
+        from services.stt_faster import transcribe_local
+        return await transcribe_local(audio_bytes)
+    return await _transcribe_openai(audio_bytes, filename)
+
+
+async def gather_limited(coros: Iterable[Awaitable[T]], max_concurrency: int = 10) -> List[T]:
+    """
+    Await independent calls concurrently, at most max_concurrency at a time.
+    
+    Results come back in input order. Use it instead of a loop of awaits when
+    a batch of calls do not depend on each other (one caller's share of the
+    global OPENAI_MAX_CONCURRENCY slots stays bounded).
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
     
-    audio_file = io.BytesIO(audio_bytes)
-    audio_file.name = filename
+    async def run(coro: Awaitable[T]) -> T:
+        async with semaphore:
+            return await coro
+    
+    return await asyncio.gather(*(run(coro) for coro in coros))
+
+
+def coalesce(func):
+    """
+    Decorator sharing one in-flight call between concurrent identical requests.
     
-    response = client.audio.transcriptions.create(
-        model="whisper-1",
-        file=audio_file,
+    The TTS and Whisper endpoints have no batch mode, so merging duplicate
+    requests (same text, same audio buffer) is the coalescing available.
+    """
+    in_flight: Dict[tuple, asyncio.Future] = {}
+    
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        key = (args, tuple(sorted(kwargs.items())))
+        future = in_flight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(func(*args, **kwargs))
+            in_flight[key] = future
+            future.add_done_callback(lambda _: in_flight.pop(key, None))
+        # Shield so one caller cancelling does not cancel the others
+        return await asyncio.shield(future)
+    return wrapper
+
+
+@coalesce
+@openai_call
+async def _transcribe_openai(audio_bytes: bytes, filename: str) -> str:
+    """Transcribe audio with the OpenAI transcription API (model from OPENAI_STT_MODEL)."""
+    # (filename, bytes) is sent as-is in the multipart body, no file object needed
+    response = await _get_client().audio.transcriptions.create(
+        model=_model("OPENAI_STT_MODEL"),
+        file=(filename, audio_bytes),
         language="fr"
     )
     
     return response.text
 
 
+@openai_call
 async def chat_response(
     messages: List[Dict[str, str]], 
     system_prompt: str,
@@ -56,8 +251,8 @@ async def chat_response(
     """
     full_messages = [{"role": "system", "content": system_prompt}] + messages
     
-    response = client.chat.completions.create(
-        model="gpt-4o",
+    response = await _get_client().chat.completions.create(
+        model=_model("OPENAI_CHAT_MODEL"),
         messages=full_messages,
         temperature=temperature,
         max_tokens=max_tokens
@@ -66,6 +261,22 @@ async def chat_response(
     return response.choices[0].message.content
 
 
+def stream_chat_response(
+    messages: List[Dict[str, str]],
+    system_prompt: str,
+    temperature: float = 0.7,
+    max_tokens: int = 500
+) -> AsyncIterator[str]:
+    """Streaming variant of chat_response, yielding text deltas."""
+    return _stream_chat(
+        [{"role": "system", "content": system_prompt}] + messages,
+        temperature=temperature,
+        max_tokens=max_tokens
+    )
+
+
+@coalesce
+@openai_call
 async def text_to_speech(text: str, voice: str = "nova") -> bytes:
     """
     Convert text to speech using OpenAI TTS.
@@ -77,8 +288,8 @@ async def text_to_speech(text: str, voice: str = "nova") -> bytes:
     Returns:
         Audio bytes (MP3 format)
     """
-    response = client.audio.speech.create(
-        model="tts-1",
+    response = await _get_client().audio.speech.create(
+        model=_model("OPENAI_TTS_MODEL"),
         voice=voice,
         input=text,
         response_format="mp3"
@@ -87,17 +298,110 @@ async def text_to_speech(text: str, voice: str = "nova") -> bytes:
     return response.content
 
 
-async def categorize_questions(questions: List[str]) -> Dict[str, List[str]]:
+TTS_CHUNK_SIZE = 8192  # bytes per streamed MP3 chunk
+
+
+@_retry_transient
+async def _open_speech(text: str, voice: str):
+    """Start a TTS response, holding a concurrency slot only until its headers arrive."""
+    await _throttle(estimate_tokens(text))
+    async with _get_semaphore():
+        return await _get_client().audio.speech.with_streaming_response.create(
+            model=_model("OPENAI_TTS_MODEL"),
+            voice=voice,
+            input=text,
+            response_format="mp3"
+        ).__aenter__()
+
+
+async def _pump_speech(text: str, voice: str, queue: asyncio.Queue):
+    """Read a TTS response into the queue at network speed, then put None."""
+    try:
+        response = await _open_speech(text, voice)
+        try:
+            async for chunk in response.iter_bytes(TTS_CHUNK_SIZE):
+                queue.put_nowait(chunk)
+        finally:
+            await response.close()
+    finally:
+        queue.put_nowait(None)
+
+
+async def stream_speech(text: str, voice: str = "nova") -> AsyncIterator[bytes]:
     """
-    Categorize questions into themes using GPT-4.
+    Stream speech audio chunks as OpenAI TTS produces them.
+    
+    The response is buffered by a background task, so a slow listener does
+    not keep its OpenAI concurrency slot (nor the connection) busy.
     
     Args:
-        questions: List of interview questions
+        text: Text to convert
+        voice: Voice to use (alloy, echo, fable, onyx, nova, shimmer)
+    
+    Yields:
+        MP3 audio chunks
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+    producer = asyncio.create_task(_pump_speech(text, voice, queue))
+    try:
+        while (chunk := await queue.get()) is not None:
+            yield chunk
+        await producer  # re-raise a failed request
+    finally:
+        producer.cancel()
+
+
+EMBEDDING_MODEL = "text-embedding-3-small"
+
+
+@openai_call
+async def embed_texts(texts: List[str]) -> List[List[float]]:
+    """
+    Embed a batch of texts in a single request.
+    
+    Args:
+        texts: Texts to embed (up to 2048 per call)
     
     Returns:
-        Dict mapping theme names to lists of questions
+        One embedding vector per input, in order
+    """
+    response = await _get_client().embeddings.create(
+        model=EMBEDDING_MODEL,
+        input=texts
+    )
+    
+    return [item.embedding for item in response.data]
+
+
+def _log_cache_usage(response):
+    """Debug-log how many prompt tokens OpenAI served from its prompt cache."""
+    usage = getattr(response, "usage", None)
+    details = getattr(usage, "prompt_tokens_details", None) if usage else None
+    if details is not None:
+        logger.debug("prompt cache: %s/%s tokens cached", details.cached_tokens, usage.prompt_tokens)
+
+
+async def _complete(system_prompt: str, user_prompt: str, tier: str = "OPENAI_CHAT_MODEL", **kwargs) -> str:
     """
-    prompt = f"""Tu dois catégoriser ces questions d'entretien en 4-5 thèmes.
+    Single GPT completion with a static system prefix.
+    
+    OpenAI caches prompt prefixes automatically: keeping instructions and
+    format specs in a byte-identical system message, with only per-call
+    values in the user message, lets repeated calls hit that cache.
+    """
+    response = await _get_client().chat.completions.create(
+        model=_model(tier),
+        messages=[
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ],
+        **kwargs
+    )
+    _log_cache_usage(response)
+    return response.choices[0].message.content
+
+
+CATEGORIZE_SYSTEM_PROMPT = """Tu dois catégoriser des questions d'entretien en 4-5 thèmes.
 
 Thèmes suggérés (tu peux les adapter) :
 - "Questions chiantes" : les questions difficiles, pièges ou stressantes
@@ -106,32 +410,160 @@ Thèmes suggérés (tu peux les adapter) :
 - "Questions projet" : projet entrepreneurial, vision business
 - "Questions soft skills" : leadership, gestion d'équipe, échec, etc.
 
-Questions à catégoriser :
-{json.dumps(questions, ensure_ascii=False, indent=2)}
-
 Réponds UNIQUEMENT en JSON valide avec ce format :
-{{
-  "themes": {{
-    "Nom du thème 1": ["question 1", "question 2"],
-    "Nom du thème 2": ["question 3", "question 4"]
-  }}
-}}
+{"themes": {"Nom du thème 1": ["question 1", "question 2"], "Nom du thème 2": ["question 3", "question 4"]}}
 
 Assure-toi que TOUTES les questions sont catégorisées.
 """
+
+
+BATCH_POLL_INTERVAL = 10  # seconds between Batch API status checks
+BATCH_FINAL_STATES = {"completed", "failed", "expired", "cancelled"}
+
+CATEGORIZE_CHUNK_SIZE = 50  # questions per request, keeps the JSON reply within max_tokens
+CATEGORIZE_CONCURRENCY = 5
+
+_CATEGORIZE_PARAMS = {
+    "temperature": 0.3,
+    "max_tokens": 2000,
+    "response_format": {"type": "json_object"}
+}
+
+
+def _categorize_prompt(questions: List[str], fixed_themes: bool = False) -> str:
+    # Chunks are categorized independently: they must agree on theme names
+    note = "\nUtilise uniquement les thèmes suggérés, avec exactement ces noms.\n" if fixed_themes else ""
+    return f"""Questions à catégoriser :
+{orjson.dumps(questions).decode()}
+{note}"""
+
+
+async def categorize_questions(questions: List[str], interactive: bool = True) -> Dict[str, List[str]]:
+    """
+    Categorize questions into themes using GPT-4.
     
-    response = client.chat.completions.create(
-        model="gpt-4o",
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.3,
-        max_tokens=2000,
-        response_format={"type": "json_object"}
-    )
+    Large lists are split into chunks of CATEGORIZE_CHUNK_SIZE, categorized
+    concurrently against the fixed theme list, and merged.
+    
+    Args:
+        questions: List of interview questions
+        interactive: Answer now with live completions; when False the job
+            goes through the Batch API (half price, separate rate limits,
+            but it may take minutes to hours)
+    
+    Returns:
+        Dict mapping theme names to lists of questions
+    """
+    chunks = [questions[i:i + CATEGORIZE_CHUNK_SIZE] for i in range(0, len(questions), CATEGORIZE_CHUNK_SIZE)]
+    prompts = [_categorize_prompt(chunk, fixed_themes=len(chunks) > 1) for chunk in chunks]
+    
+    if interactive:
+        contents = await gather_limited((_categorize_live(prompt) for prompt in prompts), CATEGORIZE_CONCURRENCY)
+    else:
+        contents = await _categorize_batch(prompts)
+    
+    merged: Dict[str, List[str]] = defaultdict(list)
+    for content in contents:
+        for theme, theme_questions in orjson.loads(content).get("themes", {}).items():
+            merged[theme].extend(theme_questions)
+    return dict(merged)
+
+
+@openai_call
+async def _categorize_live(prompt: str) -> str:
+    return await _complete(CATEGORIZE_SYSTEM_PROMPT, prompt, **_CATEGORIZE_PARAMS)
+
+
+async def _categorize_batch(prompts: List[str]) -> List[str]:
+    """
+    Run the categorization as a Batch API job (one request per chunk) and wait for it.
     
-    result = json.loads(response.choices[0].message.content)
-    return result.get("themes", {})
+    Not wrapped in openai_call: polling would hold a concurrency slot for
+    the whole job; each call here is short on its own.
+    """
+    lines = [
+        orjson.dumps({
+            "custom_id": str(i),
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": {
+                "model": _model("OPENAI_CHAT_MODEL"),
+                "messages": [
+                    {"role": "system", "content": CATEGORIZE_SYSTEM_PROMPT},
+                    {"role": "user", "content": prompt}
+                ],
+                **_CATEGORIZE_PARAMS
+            }
+        })
+        for i, prompt in enumerate(prompts)
+    ]
+    input_file = await _get_client().files.create(
+        file=("categorize.jsonl", b"\n".join(lines) + b"\n"),
+        purpose="batch"
+    )
+    batch = await _get_client().batches.create(
+        input_file_id=input_file.id,
+        endpoint="/v1/chat/completions",
+        completion_window="24h"
+    )
+    logger.info("🤖 Categorization batch %s submitted (%s requests)", batch.id, len(prompts))
+    
+    while batch.status not in BATCH_FINAL_STATES:
+        await asyncio.sleep(BATCH_POLL_INTERVAL)
+        batch = await _get_client().batches.retrieve(batch.id)
+    
+    if batch.status != "completed":
+        raise RuntimeError(f"Categorization batch {batch.id} ended as {batch.status}")
+    
+    # Output lines are not guaranteed to be in input order
+    contents = {}
+    if batch.output_file_id:
+        output = await _get_client().files.content(batch.output_file_id)
+        for raw in output.content.splitlines():
+            result = orjson.loads(raw)
+            content = _batch_result_content(result)
+            if content is not None:
+                contents[int(result["custom_id"])] = content
+    
+    # Requests that failed in the batch (listed in its error file, or in the
+    # output with an error) are redone live rather than failing the whole job
+    failed = [i for i in range(len(prompts)) if i not in contents]
+    if failed:
+        logger.warning("⚠️ %s/%s categorization batch requests failed, retrying them live", len(failed), len(prompts))
+        retried = await gather_limited((_categorize_live(prompts[i]) for i in failed), CATEGORIZE_CONCURRENCY)
+        contents.update(zip(failed, retried))
+    return [contents[i] for i in range(len(prompts))]
+
+
+def _batch_result_content(result: dict) -> Optional[str]:
+    """Completion text of one Batch API output line, or None if that request failed."""
+    response = result.get("response") or {}
+    if result.get("error") or response.get("status_code") != 200:
+        logger.warning(
+            "⚠️ Categorization batch request %s failed: %s",
+            result.get("custom_id"), result.get("error") or response.get("status_code")
+        )
+        return None
+    try:
+        return response["body"]["choices"][0]["message"]["content"]
+    except (KeyError, IndexError, TypeError):
+        logger.warning("⚠️ Categorization batch request %s returned no completion", result.get("custom_id"))
+        return None
 
 
+DEBRIEF_SYSTEM_PROMPT = """Tu viens de coacher quelqu'un pour son entretien au Master X-HEC Entrepreneurs.
+Tu vas recevoir le transcript complet de la session.
+
+Génère un DEBRIEF STRUCTURÉ en t'adressant DIRECTEMENT à la personne (utilise "tu", pas "le candidat").
+
+Réponds en JSON avec EXACTEMENT ce format :
+{"points_forts": [{"titre": "Titre court du point fort", "detail": "Explication en t'adressant directement à la personne (tu as bien fait de..., ta réponse sur...)"}], "points_amelioration": [{"titre": "Titre court du point à améliorer", "detail": "Explication en t'adressant directement (tu devrais..., ta réponse manquait de...)", "conseil": "Conseil concret en tutoyant"}], "note_globale": {"score": "X/10", "commentaire": "Appréciation globale en 2-3 phrases en tutoyant"}, "prochain_objectif": "Un objectif concret pour ta prochaine session"}
+
+IMPORTANT : Tutoie toujours, sois direct et bienveillant. Cite des exemples spécifiques de la session.
+"""
+
+
+@openai_call
 async def generate_debrief(transcript: List[Dict], mode: str) -> Dict:
     """
     Generate an intelligent debrief from the session transcript.
@@ -149,65 +581,27 @@ async def generate_debrief(transcript: List[Dict], mode: str) -> Dict:
         for item in transcript
     ])
     
-    prompt = f"""Tu viens de coacher quelqu'un pour son entretien au Master X-HEC Entrepreneurs.
-Voici le transcript complet de la session :
+    prompt = f"""Voici le transcript complet de la session :
 
 {formatted_transcript}
-
----
-
-Génère un DEBRIEF STRUCTURÉ en t'adressant DIRECTEMENT à la personne (utilise "tu", pas "le candidat").
-
-Réponds en JSON avec EXACTEMENT ce format :
-{{
-  "points_forts": [
-    {{
-      "titre": "Titre court du point fort",
-      "detail": "Explication en t'adressant directement à la personne (tu as bien fait de..., ta réponse sur...)"
-    }}
-  ],
-  "points_amelioration": [
-    {{
-      "titre": "Titre court du point à améliorer", 
-      "detail": "Explication en t'adressant directement (tu devrais..., ta réponse manquait de...)",
-      "conseil": "Conseil concret en tutoyant"
-    }}
-  ],
-  "note_globale": {{
-    "score": "X/10",
-    "commentaire": "Appréciation globale en 2-3 phrases en tutoyant"
-  }},
-  "prochain_objectif": "Un objectif concret pour ta prochaine session"
-}}
-
-IMPORTANT : Tutoie toujours, sois direct et bienveillant. Cite des exemples spécifiques de la session.
 """
     
-    response = client.chat.completions.create(
-        model="gpt-4o",
-        messages=[{"role": "user", "content": prompt}],
+    content = await _complete(
+        DEBRIEF_SYSTEM_PROMPT,
+        prompt,
         temperature=0.5,
         max_tokens=1500,
         response_format={"type": "json_object"}
     )
     
-    return json.loads(response.choices[0].message.content)
-
+    return orjson.loads(content)
 
-async def get_coach_intro(dossier_text: str, master_context: str) -> str:
-    """
-    Generate the coach's intro asking what the user wants to work on.
-    
-    Returns:
-        Coach's opening message
-    """
-    prompt = f"""Tu es un coach d'entretien X-HEC. Le candidat vient de commencer une session.
 
-Contexte du Master :
-{master_context[:500]}...
+DOSSIER_EXCERPT_LENGTH = 500  # characters of the dossier the intro prompt uses
 
-Extrait du dossier du candidat :
-{dossier_text[:500]}...
+# Everything but the dossier is the same for every session (the master
+# context only changes on rescrape), so it forms the cacheable prefix
+COACH_INTRO_PROMPT = """Tu es un coach d'entretien X-HEC. Le candidat vient de commencer une session.
 
 Commence par te présenter BRIÈVEMENT (1-2 phrases) et demande au candidat ce qu'il veut travailler aujourd'hui.
 Propose-lui les options :
@@ -215,36 +609,49 @@ Propose-lui les options :
 - Faire une simulation d'entretien complète
 
 Sois chaleureux mais professionnel. Max 4-5 phrases au total.
+
+Contexte du Master :
+{master_context}...
 """
-    
-    response = client.chat.completions.create(
-        model="gpt-4o",
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.7,
-        max_tokens=200
-    )
-    
-    return response.choices[0].message.content
 
 
-async def get_question_feedback(question: str, response: str) -> str:
+async def get_coach_intro(dossier_excerpt: str, master_context_excerpt: str) -> str:
     """
-    Generate immediate feedback for a single answer.
+    Generate the coach's intro asking what the user wants to work on.
+    
+    Served from the response cache when the same dossier starts a new
+    session against the same master context.
     
     Args:
-        question: The question that was asked
-        response: The candidate's response
+        dossier_excerpt: Start of the dossier, already cut to DOSSIER_EXCERPT_LENGTH
+        master_context_excerpt: Start of the master context (see get_master_context_info)
     
     Returns:
-        Short, direct feedback
+        Coach's opening message
     """
-    prompt = f"""Tu es coach d'entretien pour le Master X-HEC Entrepreneurs (programme de HEC Paris pour les entrepreneurs).
-La personne que tu coaches postule UNIQUEMENT pour ce master X-HEC, pas pour un autre programme.
+    key = f"{master_context_excerpt}\0{dossier_excerpt}"
+    intro = await asyncio.to_thread(_response_cache.get, INTRO_CACHE_SCOPE, key, semantic=False)
+    if intro is None:
+        intro = await _generate_coach_intro(dossier_excerpt, master_context_excerpt)
+        if intro:
+            await asyncio.to_thread(_response_cache.put, INTRO_CACHE_SCOPE, key, intro, semantic=False)
+    return intro
+
+
+@openai_call
+async def _generate_coach_intro(dossier_excerpt: str, master_context_excerpt: str) -> str:
+    return await _complete(
+        COACH_INTRO_PROMPT.format(master_context=master_context_excerpt),
+        f"Extrait du dossier du candidat :\n{dossier_excerpt}...",
+        temperature=0.7,
+        max_tokens=200
+    )
 
-Analyse cette réponse et donne un feedback COURT et DIRECT en tutoyant.
 
-Question posée : {question}
-Réponse : {response}
+QUESTION_FEEDBACK_SYSTEM_PROMPT = """Tu es coach d'entretien pour le Master X-HEC Entrepreneurs (programme de HEC Paris pour les entrepreneurs).
+La personne que tu coaches postule UNIQUEMENT pour ce master X-HEC, pas pour un autre programme.
+
+Analyse la réponse qu'on te donne et donne un feedback COURT et DIRECT en tutoyant.
 
 Ton feedback doit :
 1. Dire si c'est bien ou pas (1 phrase)
@@ -254,17 +661,88 @@ Ton feedback doit :
 IMPORTANT : Reste focalisé sur le contexte X-HEC Entrepreneurs. Ne mentionne pas d'autres écoles ou programmes.
 MAX 4-5 phrases au total. Tutoie, sois direct comme un vrai coach.
 """
+
+
+def _question_feedback_prompt(question: str, response: str) -> str:
+    return f"""Question posée : {question}
+Réponse : {response}
+"""
+
+
+NEXT_QUESTION_SYSTEM_PROMPT = """Tu es coach d'entretien pour le Master X-HEC Entrepreneurs (HEC Paris).
+Tu prépares quelqu'un à son entretien d'admission pour CE programme spécifiquement.
+
+On te donne le thème actuel, éventuellement l'échange précédent, et les questions disponibles.
+S'il y a un échange précédent, fais une transition naturelle (1 phrase max) puis pose la question suivante.
+
+Choisis UNE question et pose-la naturellement, comme à l'oral. Tutoie la personne.
+IMPORTANT : Reste focalisé sur X-HEC, ne mentionne pas d'autres écoles.
+"""
+
+
+def _next_question_prompt(
+    theme: str,
+    available_questions: List[str],
+    asked_questions: List[str],
+    last_exchange: Optional[Dict] = None
+) -> Optional[str]:
+    """Build the per-turn part of the question-selection prompt, or None if nothing is left to ask."""
+    asked = set(asked_questions)
+    remaining = [q for q in available_questions if q not in asked]
+    
+    if not remaining:
+        return None
     
-    response_obj = client.chat.completions.create(
-        model="gpt-4o",
-        messages=[{"role": "user", "content": prompt}],
+    context = ""
+    if last_exchange:
+        context = f"""
+Échange précédent :
+Q: {last_exchange.get('question', '')}
+R: {last_exchange.get('response', '')}
+"""
+    
+    return f"""Thème actuel : {theme}
+{context}
+Questions disponibles :
+{orjson.dumps(remaining).decode()}
+"""
+
+
+async def get_question_feedback(question: str, response: str) -> str:
+    """
+    Generate immediate feedback for a single answer.
+    
+    Rehearsed answers are often near-identical: feedback already given for
+    the same question is reused when the answer matches exactly or its
+    embedding is within the cache's similarity threshold.
+    
+    Args:
+        question: The question that was asked
+        response: The candidate's response
+    
+    Returns:
+        Short, direct feedback
+    """
+    feedback = await asyncio.to_thread(_response_cache.get, question, response)
+    if feedback is None:
+        feedback = await _generate_question_feedback(question, response)
+        if feedback:
+            await asyncio.to_thread(_response_cache.put, question, response, feedback)
+    return feedback
+
+
+@openai_call
+async def _generate_question_feedback(question: str, response: str) -> str:
+    return await _complete(
+        QUESTION_FEEDBACK_SYSTEM_PROMPT,
+        _question_feedback_prompt(question, response),
+        tier="OPENAI_FAST_CHAT_MODEL",
         temperature=0.6,
         max_tokens=200
     )
-    
-    return response_obj.choices[0].message.content
 
 
+@openai_call
 async def select_next_question(
     theme: str, 
     available_questions: List[str],
@@ -283,39 +761,101 @@ async def select_next_question(
     Returns:
         The next question to ask (with optional transition)
     """
-    remaining = [q for q in available_questions if q not in asked_questions]
-    
-    if not remaining:
+    prompt = _next_question_prompt(theme, available_questions, asked_questions, last_exchange)
+    if prompt is None:
         return None
     
-    context = ""
-    if last_exchange:
-        context = f"""
-Échange précédent :
-Q: {last_exchange.get('question', '')}
-R: {last_exchange.get('response', '')}
+    return await _complete(
+        NEXT_QUESTION_SYSTEM_PROMPT,
+        prompt,
+        tier="OPENAI_FAST_CHAT_MODEL",
+        temperature=0.7,
+        max_tokens=200
+    )
 
-Fais une transition naturelle (1 phrase max) puis pose la question suivante.
-"""
-    
-    prompt = f"""Tu es coach d'entretien pour le Master X-HEC Entrepreneurs (HEC Paris).
-Tu prépares quelqu'un à son entretien d'admission pour CE programme spécifiquement.
 
-Thème actuel : {theme}
-{context}
+async def _stream_chat(
+    messages: List[Dict[str, str]],
+    temperature: float,
+    max_tokens: int,
+    tier: str = "OPENAI_CHAT_MODEL"
+) -> AsyncIterator[str]:
+    """Stream the text deltas of a GPT chat completion as they arrive."""
+    await _throttle(sum(estimate_tokens(m["content"]) for m in messages))
+    async with _get_semaphore():
+        started = time.perf_counter()
+        stream = await _get_client().chat.completions.create(
+            model=_model(tier),
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            stream=True
+        )
+        first = True
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                if first:
+                    # Time to the first content delta, i.e. what the user perceives
+                    logger.debug("chat TTFT: %.0f ms", (time.perf_counter() - started) * 1000)
+                    first = False
+                yield chunk.choices[0].delta.content
+
+
+def _stream_completion(
+    system_prompt: str,
+    user_prompt: str,
+    temperature: float,
+    max_tokens: int,
+    tier: str = "OPENAI_CHAT_MODEL"
+) -> AsyncIterator[str]:
+    """Stream a completion with the same static-prefix layout as _complete."""
+    return _stream_chat(
+        [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ],
+        temperature=temperature,
+        max_tokens=max_tokens,
+        tier=tier
+    )
 
-Questions disponibles :
-{json.dumps(remaining, ensure_ascii=False)}
 
-Choisis UNE question et pose-la naturellement, comme à l'oral. Tutoie la personne.
-IMPORTANT : Reste focalisé sur X-HEC, ne mentionne pas d'autres écoles.
-"""
+async def stream_question_feedback(question: str, response: str) -> AsyncIterator[str]:
+    """Streaming variant of get_question_feedback, yielding text deltas (one delta on a cache hit)."""
+    feedback = await asyncio.to_thread(_response_cache.get, question, response)
+    if feedback is not None:
+        yield feedback
+        return
     
-    response = client.chat.completions.create(
-        model="gpt-4o",
-        messages=[{"role": "user", "content": prompt}],
+    parts = []
+    async for delta in _stream_completion(
+        QUESTION_FEEDBACK_SYSTEM_PROMPT,
+        _question_feedback_prompt(question, response),
+        temperature=0.6,
+        max_tokens=200,
+        tier="OPENAI_FAST_CHAT_MODEL"
+    ):
+        parts.append(delta)
+        yield delta
+    
+    if parts:
+        await asyncio.to_thread(_response_cache.put, question, response, "".join(parts))
+
+
+def stream_next_question(
+    theme: str,
+    available_questions: List[str],
+    asked_questions: List[str],
+    last_exchange: Optional[Dict] = None
+) -> Optional[AsyncIterator[str]]:
+    """Streaming variant of select_next_question; None if no question remains."""
+    prompt = _next_question_prompt(theme, available_questions, asked_questions, last_exchange)
+    if prompt is None:
+        return None
+    return _stream_completion(
+        NEXT_QUESTION_SYSTEM_PROMPT,
+        prompt,
         temperature=0.7,
-        max_tokens=200
+        max_tokens=200,
+        tier="OPENAI_FAST_CHAT_MODEL"
     )
-    
-    return response.choices[0].message.content
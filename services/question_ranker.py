@@ -0,0 +1,113 @@
+"""Embedding index used to shortlist the next question from a large pool."""
+
+import os
+import hashlib
+import logging
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from services.openai_services import EMBEDDING_MODEL, embed_texts, gather_limited
+
+logger = logging.getLogger(__name__)
+
+TOP_K = 3
+EMBED_BATCH_SIZE = 2048  # OpenAI embeddings input limit
+EMBEDDINGS_FILE = Path(__file__).parent.parent / "data" / "question_embeddings.npz"
+
+# Question text -> row in _matrix (rows are L2-normalized)
+_rows: Dict[str, int] = {}
+_matrix: np.ndarray = np.empty((0, 0), dtype=np.float32)
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def _questions_digest(questions: List[str]) -> str:
+    """Identifies a question list + embedding model, to validate the on-disk cache."""
+    h = hashlib.blake2b(EMBEDDING_MODEL.encode(), digest_size=16)
+    for q in questions:
+        h.update(b"\0" + q.encode("utf-8"))
+    return h.hexdigest()
+
+
+def _load_embeddings(digest: str) -> Optional[np.ndarray]:
+    """Cached embedding matrix for this question list, or None."""
+    try:
+        with np.load(EMBEDDINGS_FILE) as data:
+            if str(data["digest"]) == digest:
+                return data["matrix"]
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        logger.warning("⚠️ Could not load question embeddings: %s", e)
+    return None
+
+
+def _save_embeddings(digest: str, matrix: np.ndarray):
+    try:
+        # Write then rename, so concurrent workers never read a partial file
+        tmp_file = EMBEDDINGS_FILE.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_file, 'wb') as f:
+            np.savez(f, digest=np.array(digest), matrix=matrix)
+        os.replace(tmp_file, EMBEDDINGS_FILE)
+    except Exception as e:
+        logger.warning("⚠️ Could not save question embeddings: %s", e)
+
+
+async def build_index(questions: List[str]):
+    """
+    Embed every question once; call at startup and after a questions reload.
+    
+    Duplicates are embedded once, and the matrix is cached on disk so
+    restarts with the same question bank make no embedding call at all.
+    """
+    global _rows, _matrix
+    
+    unique = list(dict.fromkeys(questions))
+    if not unique:
+        return
+    
+    digest = _questions_digest(unique)
+    matrix = _load_embeddings(digest)
+    
+    if matrix is None:
+        batches = await gather_limited(
+            embed_texts(unique[start:start + EMBED_BATCH_SIZE])
+            for start in range(0, len(unique), EMBED_BATCH_SIZE)
+        )
+        vectors = [vector for batch in batches for vector in batch]
+        matrix = _normalize(np.asarray(vectors, dtype=np.float32))
+        _save_embeddings(digest, matrix)
+    
+    _matrix = matrix
+    _rows = {q: i for i, q in enumerate(unique)}
+
+
+async def shortlist(response_text: str, candidates: List[str], k: int = TOP_K) -> List[str]:
+    """
+    Return the k candidates closest to the candidate's last answer, best first.
+    
+    Falls back to the candidates unchanged when the pool is already small,
+    the index is not built, or the embedding call fails.
+    """
+    if len(candidates) <= k or not response_text.strip():
+        return candidates
+    
+    indexed = [q for q in candidates if q in _rows]
+    if len(indexed) <= k:
+        return candidates
+    
+    try:
+        [vector] = await embed_texts([response_text])
+    except Exception as e:
+        logger.warning("⚠️ Question shortlist failed: %s", e)
+        return candidates
+    
+    query = _normalize(np.asarray(vector, dtype=np.float32))
+    scores = _matrix[[_rows[q] for q in indexed]] @ query
+    best = np.argpartition(-scores, k)[:k]
+    return [indexed[i] for i in best[np.argsort(-scores[best])]]
@@ -4,14 +4,23 @@ Questions are loaded from an Excel file in the data folder.
 Includes AI-powered theme categorization.
 """
 
+import os
 import json
+import random
+import logging
+from functools import cache
 from pathlib import Path
-from typing import List, Dict, Optional
-import pandas as pd
+from typing import List, Dict, FrozenSet, Optional
+import orjson
+
+from services.openai_services import categorize_questions
+
+logger = logging.getLogger(__name__)
 
 DATA_DIR = Path(__file__).parent.parent / "data"
 QUESTIONS_FILE = DATA_DIR / "questions.xlsx"
 THEMES_CACHE_FILE = DATA_DIR / "themes_cache.json"
+QUESTIONS_CACHE_FILE = DATA_DIR / "questions.cache.json"
 
 
 class QuestionsDatabase:
@@ -21,91 +30,162 @@ class QuestionsDatabase:
         self.questions: List[Dict] = []
         self.themes: Dict[str, List[str]] = {}
         self.themes_loaded = False
+        # Lookup structures derived from questions/themes by _rebuild_index
+        self._all_questions: List[str] = []
+        self._theme_names: FrozenSet[str] = frozenset()
+        self._theme_keys: Dict[str, str] = {}  # lowercased name -> theme name
+        # st_mtime of THEMES_CACHE_FILE as last loaded or saved by this process
+        self._themes_mtime: Optional[float] = None
         self.load_questions()
     
     def load_questions(self):
         """Load questions from the Excel file."""
+        self.questions = self._read_questions()
+        self._rebuild_index()
+    
+    def _read_questions(self) -> List[Dict]:
+        """Questions from the cache or Excel file (default questions on failure)."""
         if not QUESTIONS_FILE.exists():
-            print(f"⚠️ Questions file not found: {QUESTIONS_FILE}")
-            print("   Using default questions...")
-            self.questions = self._get_default_questions()
-            return
+            logger.warning("⚠️ Questions file not found: %s", QUESTIONS_FILE)
+            logger.info("   Using default questions...")
+            return self._get_default_questions()
         
         try:
-            df = pd.read_excel(QUESTIONS_FILE)
-            df.columns = df.columns.str.lower().str.strip()
+            questions = self._load_questions_cache()
+            if questions is None:
+                questions = self._parse_questions_file()
+                self._save_questions_cache(questions)
             
-            # Find question column
-            question_col = None
-            for col in ['question', 'questions', 'q']:
-                if col in df.columns:
-                    question_col = col
-                    break
-            
-            if question_col is None:
-                question_col = df.columns[0]
-            
-            # Build questions list
-            self.questions = []
-            for _, row in df.iterrows():
-                q_text = str(row[question_col]).strip() if pd.notna(row[question_col]) else ""
-                if not q_text:
-                    continue
-                
-                question = {
-                    "question": q_text,
-                    "theme": "Non catégorisé",
-                    "difficulty": "Moyen"
-                }
-                self.questions.append(question)
-            
-            print(f"✅ Loaded {len(self.questions)} questions from database")
+            logger.info("✅ Loaded %s questions from database", len(questions))
             
             # Try to load cached themes
             self._load_themes_cache()
+            return questions
             
         except Exception as e:
-            print(f"⚠️ Error loading questions: {e}")
-            print("   Using default questions...")
-            self.questions = self._get_default_questions()
+            logger.warning("⚠️ Error loading questions: %s", e)
+            logger.info("   Using default questions...")
+            return self._get_default_questions()
+    
+    def _parse_questions_file(self) -> List[Dict]:
+        """Parse the Excel file (slow path: imports pandas)."""
+        import pandas as pd
+        
+        df = pd.read_excel(QUESTIONS_FILE, engine="calamine")
+        df.columns = df.columns.str.lower().str.strip()
+        
+        # Find question column
+        question_col = None
+        for col in ['question', 'questions', 'q']:
+            if col in df.columns:
+                question_col = col
+                break
+        
+        if question_col is None:
+            question_col = df.columns[0]
+        
+        # Build questions list with column ops (no per-row boxing)
+        column = df[question_col]
+        texts = column.astype(str).str.strip()
+        texts = texts[column.notna() & texts.ne("")]
+        
+        questions = pd.DataFrame({
+            "question": texts,
+            "theme": "Non catégorisé",
+            "difficulty": "Moyen"
+        }).to_dict("records")
+        
+        return questions
+    
+    def _load_questions_cache(self) -> Optional[List[Dict]]:
+        """Parsed questions from the JSON cache, or None if missing or older than the Excel file."""
+        try:
+            if QUESTIONS_CACHE_FILE.stat().st_mtime < QUESTIONS_FILE.stat().st_mtime:
+                return None
+            with open(QUESTIONS_CACHE_FILE, 'rb') as f:
+                return orjson.loads(f.read())
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning("⚠️ Could not load questions cache: %s", e)
+            return None
+    
+    def _save_questions_cache(self, questions: List[Dict]):
+        """Save parsed questions so later starts skip the Excel file."""
+        try:
+            tmp_file = QUESTIONS_CACHE_FILE.with_suffix(f".{os.getpid()}.tmp")
+            with open(tmp_file, 'wb') as f:
+                f.write(orjson.dumps(questions))
+            os.replace(tmp_file, QUESTIONS_CACHE_FILE)
+        except Exception as e:
+            logger.warning("⚠️ Could not save questions cache: %s", e)
+    
+    def _rebuild_index(self):
+        """Recompute the lookup structures; call after questions or themes change."""
+        self._all_questions = [q["question"] for q in self.questions]
+        self._theme_names = frozenset(self.themes)
+        self._theme_keys = {theme.lower(): theme for theme in self.themes}
     
     def _load_themes_cache(self):
         """Load themes from cache file if available."""
         if THEMES_CACHE_FILE.exists():
             try:
-                with open(THEMES_CACHE_FILE, 'r', encoding='utf-8') as f:
-                    self.themes = json.load(f)
+                mtime = THEMES_CACHE_FILE.stat().st_mtime
+                with open(THEMES_CACHE_FILE, 'rb') as f:
+                    self.themes = orjson.loads(f.read())
                 self.themes_loaded = True
-                print(f"✅ Loaded {len(self.themes)} themes from cache")
+                self._themes_mtime = mtime
+                logger.info("✅ Loaded %s themes from cache", len(self.themes))
             except Exception as e:
-                print(f"⚠️ Could not load themes cache: {e}")
+                logger.warning("⚠️ Could not load themes cache: %s", e)
+    
+    def reload_themes(self) -> bool:
+        """Reload themes from the cache file (e.g. written by another worker); True if any."""
+        self._load_themes_cache()
+        self._rebuild_index()
+        return self.has_themes()
+    
+    def refresh_themes(self) -> bool:
+        """Reload themes if another worker rewrote the cache file since; True if reloaded."""
+        try:
+            mtime = THEMES_CACHE_FILE.stat().st_mtime
+        except FileNotFoundError:
+            return False
+        if mtime == self._themes_mtime:
+            return False
+        return self.reload_themes()
     
     def _save_themes_cache(self):
         """Save themes to cache file."""
         try:
-            with open(THEMES_CACHE_FILE, 'w', encoding='utf-8') as f:
+            # Write then rename, so concurrent workers never read a partial file
+            tmp_file = THEMES_CACHE_FILE.with_suffix(f".{os.getpid()}.tmp")
+            with open(tmp_file, 'w', encoding='utf-8') as f:
                 json.dump(self.themes, f, ensure_ascii=False, indent=2)
-            print(f"✅ Saved themes cache")
+            os.replace(tmp_file, THEMES_CACHE_FILE)
+            self._themes_mtime = THEMES_CACHE_FILE.stat().st_mtime
+            logger.info("✅ Saved themes cache")
         except Exception as e:
-            print(f"⚠️ Could not save themes cache: {e}")
+            logger.warning("⚠️ Could not save themes cache: %s", e)
     
-    async def categorize_with_ai(self):
-        """Use AI to categorize questions into themes."""
-        from services.openai_services import categorize_questions
-        
+    async def categorize_with_ai(self, interactive: bool = True):
+        """Use AI to categorize questions into themes (interactive=False: via the Batch API)."""
         all_questions = self.get_all_questions()
         if not all_questions:
             return
         
-        print("🤖 Categorizing questions with AI...")
+        logger.info("🤖 Categorizing questions with AI...")
         try:
-            self.themes = await categorize_questions(all_questions)
+            self.themes = await categorize_questions(all_questions, interactive=interactive)
             self.themes_loaded = True
+            self._rebuild_index()
             self._save_themes_cache()
-            print(f"✅ Questions categorized into {len(self.themes)} themes")
+            logger.info("✅ Questions categorized into %s themes", len(self.themes))
         except Exception as e:
-            print(f"⚠️ AI categorization failed: {e}")
-            self._use_default_themes()
+            logger.warning("⚠️ AI categorization failed: %s", e)
+            # A failed background batch keeps the themes already being served
+            if interactive or not self.has_themes():
+                self._use_default_themes()
     
     def _use_default_themes(self):
         """Fallback to basic theme grouping."""
@@ -113,6 +193,7 @@ class QuestionsDatabase:
             "Questions générales": self.get_all_questions()
         }
         self.themes_loaded = True
+        self._rebuild_index()
     
     def _get_default_questions(self) -> List[Dict]:
         """Return default questions if Excel file is not available."""
@@ -132,28 +213,27 @@ class QuestionsDatabase:
         ]
     
     def get_all_questions(self) -> List[str]:
-        """Get all questions as a simple list of strings."""
-        return [q["question"] for q in self.questions]
+        """Get all questions as a simple list of strings (precomputed, do not mutate)."""
+        return self._all_questions
     
-    def get_themes(self) -> List[str]:
-        """Get all available themes."""
-        return list(self.themes.keys())
+    def get_themes(self) -> FrozenSet[str]:
+        """Get all available themes (precomputed frozenset for O(1) membership)."""
+        return self._theme_names
     
     def get_questions_by_theme(self, theme: str) -> List[str]:
-        """Get questions for a specific theme."""
-        return self.themes.get(theme, [])
+        """Get questions for a specific theme (exact name, else case-insensitive)."""
+        questions = self.themes.get(theme)
+        if questions is None:
+            questions = self.themes.get(self._theme_keys.get(theme.lower()), [])
+        return questions
     
     def get_themes_with_counts(self) -> Dict[str, int]:
         """Get themes with question counts."""
         return {theme: len(questions) for theme, questions in self.themes.items()}
     
     def get_random_questions(self, count: int = 10) -> List[str]:
-        """Get a random selection of questions."""
-        import random
-        questions = self.get_all_questions()
-        if len(questions) <= count:
-            return questions
-        return random.sample(questions, count)
+        """Get a random selection of questions (always a new list, safe to modify)."""
+        return random.sample(self._all_questions, min(count, len(self._all_questions)))
     
     def get_questions_count(self) -> int:
         """Get the total number of questions."""
@@ -165,15 +245,10 @@ class QuestionsDatabase:
 
 
 # Global instance
-_questions_db: Optional[QuestionsDatabase] = None
-
-
+@cache
 def get_questions_db() -> QuestionsDatabase:
-    """Get or create the questions database instance."""
-    global _questions_db
-    if _questions_db is None:
-        _questions_db = QuestionsDatabase()
-    return _questions_db
+    """Get or create the questions database instance (cache_clear() to reload)."""
+    return QuestionsDatabase()
 
 
 def get_interview_questions(count: int = 10) -> List[str]:
@@ -0,0 +1,185 @@
+"""
+On-disk cache for generated coach text (answer feedback, session intros).
+
+Two tiers: an exact match on the normalized input, then a cosine-similarity
+match within the same scope (e.g. the same question). Embeddings come from a
+small local sentence-transformers model, so a lookup makes no network call.
+Entries live in SQLite so they survive restarts and are shared by every
+worker on the host; they expire CACHE_TTL seconds after being stored.
+"""
+
+import re
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+CACHE_FILE = Path(__file__).parent.parent / "data" / "feedback_cache.sqlite"
+EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+SIMILARITY_THRESHOLD = 0.92
+CACHE_TTL = 7 * 86400  # seconds
+PURGE_EVERY = 256  # writes between deletions of expired rows
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase and collapse whitespace so trivial variations share a key."""
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+
+class _ScopeIndex:
+    """Embeddings of one scope held in memory, caught up from SQLite by rowid."""
+    __slots__ = ("matrix", "values", "created", "last_rowid")
+    
+    def __init__(self, dim: int):
+        self.matrix = np.empty((0, dim), dtype=np.float32)
+        self.values: list[str] = []
+        self.created = np.empty(0)
+        self.last_rowid = 0
+
+
+class ResponseCache:
+    """
+    Exact + semantic cache of generated text, persisted in SQLite.
+    
+    Calls are blocking (SQLite, a local embedding and a small NumPy search):
+    run them in a worker thread from async code. Storage errors are logged
+    and count as a miss, so callers can always fall back to generating.
+    Without sentence-transformers installed, only the exact tier is used.
+    """
+    
+    def __init__(self, path: Path = CACHE_FILE, threshold: float = SIMILARITY_THRESHOLD, ttl: float = CACHE_TTL):
+        self.path = path
+        self.threshold = threshold
+        self.ttl = ttl
+        
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._writes = 0
+        self._indexes: Dict[str, _ScopeIndex] = {}
+        
+        self._model_lock = threading.Lock()
+        self._model = None
+        self._model_disabled = False
+    
+    def _connect(self) -> sqlite3.Connection:
+        if self._db is None:
+            self.path.parent.mkdir(exist_ok=True)
+            db = sqlite3.connect(self.path, check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")  # several workers read/write concurrently
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                " key BLOB PRIMARY KEY, scope TEXT NOT NULL, value TEXT NOT NULL,"
+                " embedding BLOB, created REAL NOT NULL)"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS entries_scope ON entries (scope)")
+            self._db = db
+            self._purge_expired()
+        return self._db
+    
+    def _cutoff(self) -> float:
+        return time.time() - self.ttl
+    
+    def _purge_expired(self):
+        """Delete expired rows (caller holds the lock)."""
+        with self._db:
+            self._db.execute("DELETE FROM entries WHERE created < ?", (self._cutoff(),))
+    
+    def _embed(self, text: str) -> Optional[np.ndarray]:
+        """L2-normalized embedding of the text, or None when the model is unavailable."""
+        with self._model_lock:
+            if self._model is None and not self._model_disabled:
+                try:
+                    from sentence_transformers import SentenceTransformer
+                    self._model = SentenceTransformer(EMBEDDING_MODEL)
+                except Exception as e:  # not installed, or the model could not be downloaded
+                    logger.warning("⚠️ Local embedding model unavailable, semantic response cache disabled: %s", e)
+                    self._model_disabled = True
+            model = self._model
+        
+        if model is None:
+            return None
+        return model.encode(normalize_text(text), normalize_embeddings=True).astype(np.float32)
+    
+    @staticmethod
+    def _key(scope: str, text: str) -> bytes:
+        return hashlib.blake2b(f"{scope}\0{normalize_text(text)}".encode("utf-8"), digest_size=16).digest()
+    
+    def get(self, scope: str, text: str, semantic: bool = True) -> Optional[str]:
+        """Value stored for this input, else (semantic=True) for the closest similar one."""
+        try:
+            with self._lock:
+                row = self._connect().execute(
+                    "SELECT value FROM entries WHERE key = ? AND created >= ?",
+                    (self._key(scope, text), self._cutoff())
+                ).fetchone()
+            if row is not None or not semantic:
+                return row[0] if row else None
+            
+            vector = self._embed(text)
+            if vector is None:
+                return None
+            
+            with self._lock:
+                index = self._scope_index(scope, vector.shape[0])
+                if not index.values:
+                    return None
+                scores = index.matrix @ vector
+                best = int(np.argmax(scores))
+                return index.values[best] if scores[best] >= self.threshold else None
+        except sqlite3.Error as e:
+            logger.warning("⚠️ Response cache read failed: %s", e)
+            return None
+    
+    def put(self, scope: str, text: str, value: str, semantic: bool = True):
+        """Store a value for this input (with its embedding when semantic=True)."""
+        vector = self._embed(text) if semantic else None
+        embedding = vector.tobytes() if vector is not None else None
+        
+        try:
+            with self._lock:
+                db = self._connect()
+                with db:
+                    db.execute(
+                        "INSERT OR REPLACE INTO entries (key, scope, value, embedding, created)"
+                        " VALUES (?, ?, ?, ?, ?)",
+                        (self._key(scope, text), scope, value, embedding, time.time())
+                    )
+                self._writes += 1
+                if self._writes % PURGE_EVERY == 0:
+                    self._purge_expired()
+        except sqlite3.Error as e:
+            logger.warning("⚠️ Response cache write failed: %s", e)
+    
+    def _scope_index(self, scope: str, dim: int) -> _ScopeIndex:
+        """
+        The scope's embeddings, including rows other workers added since the
+        last lookup (caller holds the lock). Expired entries are dropped.
+        """
+        index = self._indexes.get(scope)
+        if index is None:
+            index = self._indexes[scope] = _ScopeIndex(dim)
+        
+        rows = self._connect().execute(
+            "SELECT rowid, embedding, value, created FROM entries"
+            " WHERE scope = ? AND rowid > ? AND embedding IS NOT NULL AND created >= ?",
+            (scope, index.last_rowid, self._cutoff())
+        ).fetchall()
+        if rows:
+            index.last_rowid = max(row[0] for row in rows)
+            rows = [row for row in rows if len(row[1]) == dim * 4]  # skips other models' vectors
+        
+        fresh = index.created >= self._cutoff()
+        if rows or not fresh.all():
+            index.matrix = np.vstack(
+                [index.matrix[fresh]] + [np.frombuffer(row[1], dtype=np.float32)[None, :] for row in rows]
+            )
+            index.values = [v for v, keep in zip(index.values, fresh) if keep] + [row[2] for row in rows]
+            index.created = np.concatenate([index.created[fresh], [row[3] for row in rows]])
+        return index
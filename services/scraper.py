@@ -1,18 +1,45 @@
 """Web scraper for pineurs.com X-HEC guide content."""
 
-import json
 import os
+import asyncio
+import hashlib
+import logging
 from datetime import datetime
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Optional
 
-import requests
+import aiofiles
+import aiofiles.os
+import httpx
+import orjson
 from bs4 import BeautifulSoup
 
+try:
+    from selectolax.parser import HTMLParser
+except ImportError:
+    HTMLParser = None
+
+try:
+    import lxml  # noqa: F401  (only used as BeautifulSoup's parser)
+    BS4_PARSER = "lxml"
+except ImportError:
+    BS4_PARSER = "html.parser"
+
+logger = logging.getLogger(__name__)
+
 BASE_URL = "https://www.pineurs.com"
 DATA_DIR = Path(__file__).parent.parent / "data"
 CONTEXT_FILE = DATA_DIR / "master_context.json"
 LAST_SCRAPE_FILE = DATA_DIR / "last_scrape.txt"
+PREVIEW_LENGTH = 1000
+EXCERPT_LENGTH = 500  # what the coach intro prompt gets
+
+# Formatted master context + ETag + preview, tagged with the context file mtime
+_master_cache: Optional[Dict] = None
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36"
+}
 
 # Pages to scrape
 PAGES = {
@@ -24,6 +51,67 @@ PAGES = {
 }
 
 
+STRIPPED_TAGS = ('script', 'style', 'nav', 'footer', 'header')
+TEXT_TAGS = ('h1', 'h2', 'h3', 'h4', 'p', 'li')
+
+
+def _format_parts(elements) -> str:
+    """Join (tag name, text) pairs, marking headings as markdown."""
+    text_parts = []
+    for name, text in elements:
+        if text:
+            if name[0] == 'h':
+                text_parts.append(f"\n## {text}\n")
+            else:
+                text_parts.append(text)
+    return "\n".join(text_parts)
+
+
+def _extract_text(html: str) -> str:
+    """
+    Extract the readable text of a page, keeping headings as markdown.
+    
+    Uses selectolax (C parser) when installed, otherwise BeautifulSoup
+    with lxml, or with the pure-Python html.parser as a last resort.
+    """
+    if HTMLParser is not None:
+        return _extract_text_selectolax(html)
+    
+    soup = BeautifulSoup(html, BS4_PARSER)
+    
+    # Remove script and style elements
+    for element in soup(list(STRIPPED_TAGS)):
+        element.decompose()
+    
+    # Get main content
+    main_content = soup.find('main') or soup.find('article') or soup.find('body')
+    
+    if main_content:
+        # Extract text with some structure
+        return _format_parts(
+            (element.name, element.get_text(strip=True))
+            for element in main_content.find_all(list(TEXT_TAGS))
+        )
+    
+    return soup.get_text(separator='\n', strip=True)
+
+
+def _extract_text_selectolax(html: str) -> str:
+    """_extract_text on selectolax's HTMLParser."""
+    tree = HTMLParser(html)
+    tree.strip_tags(list(STRIPPED_TAGS))
+    
+    main_content = tree.css_first('main') or tree.css_first('article') or tree.body
+    
+    if main_content:
+        return _format_parts(
+            (node.tag, node.text(strip=True))
+            for node in main_content.css(",".join(TEXT_TAGS))
+        )
+    
+    return tree.text(separator='\n', strip=True)
+
+
 def scrape_page(url: str) -> Optional[str]:
     """
     Scrape content from a single page.
@@ -35,44 +123,33 @@ def scrape_page(url: str) -> Optional[str]:
         Extracted text content or None if failed
     """
     try:
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36"
-        }
-        response = requests.get(url, headers=headers, timeout=10)
+        response = httpx.get(url, headers=HEADERS, timeout=10)
         response.raise_for_status()
+        return _extract_text(response.text)
         
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # Remove script and style elements
-        for element in soup(['script', 'style', 'nav', 'footer', 'header']):
-            element.decompose()
-        
-        # Get main content
-        main_content = soup.find('main') or soup.find('article') or soup.find('body')
-        
-        if main_content:
-            # Extract text with some structure
-            text_parts = []
-            for element in main_content.find_all(['h1', 'h2', 'h3', 'h4', 'p', 'li']):
-                text = element.get_text(strip=True)
-                if text:
-                    if element.name in ['h1', 'h2', 'h3', 'h4']:
-                        text_parts.append(f"\n## {text}\n")
-                    else:
-                        text_parts.append(text)
-            
-            return "\n".join(text_parts)
-        
-        return soup.get_text(separator='\n', strip=True)
+    except Exception as e:
+        logger.warning("Error scraping %s: %s", url, e)
+        return None
+
+
+async def scrape_page_async(client: httpx.AsyncClient, url: str) -> Optional[str]:
+    """Async scrape_page on a shared client (keep-alive across pages)."""
+    try:
+        response = await client.get(url)
+        response.raise_for_status()
+        return _extract_text(response.text)
         
     except Exception as e:
-        print(f"Error scraping {url}: {e}")
+        logger.warning("Error scraping %s: %s", url, e)
         return None
 
 
-def scrape_pineurs() -> dict:
+async def scrape_pineurs_async() -> dict:
     """
-    Scrape all relevant pages from pineurs.com.
+    Scrape all relevant pages from pineurs.com concurrently.
+    
+    All pages share one HTTP/2 connection, so the scrape takes about as long
+    as the slowest page and pays for a single TLS handshake.
     
     Returns:
         Dictionary with scraped content organized by section
@@ -83,11 +160,18 @@ def scrape_pineurs() -> dict:
         "sections": {}
     }
     
-    for section_name, path in PAGES.items():
-        url = f"{BASE_URL}{path}"
-        print(f"Scraping {section_name} from {url}...")
-        
-        page_content = scrape_page(url)
+    urls = {section_name: f"{BASE_URL}{path}" for section_name, path in PAGES.items()}
+    logger.info("Scraping %s pages from %s...", len(urls), BASE_URL)
+    
+    async with httpx.AsyncClient(
+        headers=HEADERS,
+        http2=True,
+        timeout=10.0,
+        limits=httpx.Limits(max_keepalive_connections=len(urls))
+    ) as client:
+        pages = await asyncio.gather(*(scrape_page_async(client, url) for url in urls.values()))
+    
+    for (section_name, url), page_content in zip(urls.items(), pages):
         if page_content:
             content["sections"][section_name] = {
                 "url": url,
@@ -97,25 +181,73 @@ def scrape_pineurs() -> dict:
     return content
 
 
+def scrape_pineurs() -> dict:
+    """
+    Scrape all relevant pages from pineurs.com.
+    
+    Synchronous entry point (runs scrape_pineurs_async on its own event
+    loop); call it from a worker thread, not from the server's loop.
+    
+    Returns:
+        Dictionary with scraped content organized by section
+    """
+    return asyncio.run(scrape_pineurs_async())
+
+
+def _context_tmp_file() -> Path:
+    # Written then renamed, so concurrent workers never read a partial file
+    return CONTEXT_FILE.with_suffix(f".{os.getpid()}.tmp")
+
+
+def _dump_context(content: dict) -> bytes:
+    return orjson.dumps(content, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+
+
 def save_context(content: dict):
     """Save scraped content to JSON file."""
     DATA_DIR.mkdir(exist_ok=True)
     
-    with open(CONTEXT_FILE, 'w', encoding='utf-8') as f:
-        json.dump(content, f, ensure_ascii=False, indent=2)
+    tmp_file = _context_tmp_file()
+    with open(tmp_file, 'wb') as f:
+        f.write(_dump_context(content))
+    os.replace(tmp_file, CONTEXT_FILE)
+    invalidate_master_context()
     
     with open(LAST_SCRAPE_FILE, 'w') as f:
         f.write(datetime.now().isoformat())
 
 
+async def save_context_async(content: dict):
+    """save_context without blocking the event loop."""
+    DATA_DIR.mkdir(exist_ok=True)
+    
+    tmp_file = _context_tmp_file()
+    async with aiofiles.open(tmp_file, 'wb') as f:
+        await f.write(_dump_context(content))
+    await aiofiles.os.replace(tmp_file, CONTEXT_FILE)
+    invalidate_master_context()
+    
+    async with aiofiles.open(LAST_SCRAPE_FILE, 'w') as f:
+        await f.write(datetime.now().isoformat())
+
+
 def load_context() -> dict:
     """Load cached context from JSON file."""
     if CONTEXT_FILE.exists():
-        with open(CONTEXT_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        with open(CONTEXT_FILE, 'rb') as f:
+            return orjson.loads(f.read())
     return {}
 
 
+async def load_context_async() -> dict:
+    """load_context without blocking the event loop."""
+    try:
+        async with aiofiles.open(CONTEXT_FILE, 'rb') as f:
+            return orjson.loads(await f.read())
+    except FileNotFoundError:
+        return {}
+
+
 def get_last_scrape_date() -> Optional[datetime]:
     """Get the date of the last scrape."""
     if LAST_SCRAPE_FILE.exists():
@@ -138,15 +270,8 @@ def needs_rescrape() -> bool:
     return days_since > 365
 
 
-def get_master_context_text() -> str:
-    """
-    Get the master context as a formatted text string for the AI prompt.
-    
-    Returns:
-        Formatted context string
-    """
-    context = load_context()
-    
+def _format_master_context(context: dict) -> str:
+    """Format the scraped context as text for the AI prompt."""
     if not context or not context.get("sections"):
         return "Contexte du Master X-HEC non disponible. Veuillez lancer un scrape."
     
@@ -162,26 +287,89 @@ def get_master_context_text() -> str:
     return "\n".join(parts)
 
 
+def get_master_context_info() -> Dict[str, str]:
+    """
+    Get the formatted master context with its SHA-256 ETag and a short preview.
+    
+    Computed once per version of the context file (any worker's rescrape
+    changes its mtime), so callers never rebuild or re-hash it per request.
+    
+    Returns:
+        Dictionary with "text", "etag", "preview" and "excerpt"
+    """
+    global _master_cache
+    # One stat() per call (exists() would be a second syscall)
+    try:
+        mtime = CONTEXT_FILE.stat().st_mtime_ns
+    except FileNotFoundError:
+        mtime = None
+    
+    if _master_cache is None or _master_cache["mtime"] != mtime:
+        text = _format_master_context(load_context())
+        _master_cache = {
+            "mtime": mtime,
+            "text": text,
+            "etag": f'"{hashlib.sha256(text.encode()).hexdigest()}"',
+            "preview": text[:PREVIEW_LENGTH],
+            "excerpt": text[:EXCERPT_LENGTH]
+        }
+    
+    return _master_cache
+
+
+def invalidate_master_context():
+    """
+    Drop the memoized master context so the next call rebuilds it.
+    
+    save_context calls this, so a rescrape in this worker is visible at once
+    even on filesystems whose mtime granularity is too coarse to notice it.
+    """
+    global _master_cache
+    _master_cache = None
+
+
+def get_master_context_text() -> str:
+    """
+    Get the master context as a formatted text string for the AI prompt.
+    
+    Returns:
+        Formatted context string
+    """
+    return get_master_context_info()["text"]
+
+
 def update_context_if_needed() -> bool:
     """
     Check if context needs updating and update if necessary.
     
+    Synchronous wrapper around update_context_if_needed_async, for scripts.
+    
     Returns:
         True if context was updated, False otherwise
     """
+    return asyncio.run(update_context_if_needed_async())
+
+
+async def update_context_if_needed_async() -> bool:
+    """Async update_context_if_needed, for use from the server's event loop."""
     if needs_rescrape():
-        print("Context needs updating, scraping pineurs.com...")
-        content = scrape_pineurs()
-        save_context(content)
-        print("Context updated successfully!")
+        logger.info("Context needs updating, scraping pineurs.com...")
+        content = await scrape_pineurs_async()
+        await save_context_async(content)
+        logger.info("Context updated successfully!")
         return True
     return False
 
 
 def force_rescrape() -> dict:
-    """Force a rescrape regardless of last scrape date."""
-    print("Forcing rescrape of pineurs.com...")
-    content = scrape_pineurs()
-    save_context(content)
-    print("Rescrape completed!")
+    """Force a rescrape regardless of last scrape date (sync wrapper, for scripts)."""
+    return asyncio.run(force_rescrape_async())
+
+
+async def force_rescrape_async() -> dict:
+    """Async force_rescrape, for use from the server's event loop."""
+    logger.info("Forcing rescrape of pineurs.com...")
+    content = await scrape_pineurs_async()
+    await save_context_async(content)
+    logger.info("Rescrape completed!")
     return content
@@ -1,111 +1,344 @@
 """Session management for interview coaching sessions."""
 
+import io
+import os
+import time
 import uuid
+import zlib
+import pickle
+import hashlib
+import logging
+import threading
+from collections import OrderedDict, deque
 from datetime import datetime
-from typing import Optional
+from pathlib import Path
+from typing import Callable, Iterator, Optional, Union
 from dataclasses import dataclass, field
-from enum import Enum
+from enum import IntEnum, IntFlag
+from operator import length_hint
+from random import choice
 
+logger = logging.getLogger(__name__)
 
-class SessionMode(Enum):
-    QUESTION_BY_QUESTION = "question_by_question"
-    FULL_INTERVIEW = "full_interview"
+ARCHIVE_DIR = Path(__file__).parent.parent / "data" / "sessions"
+PENDING_EXCHANGES = 32  # exchanges buffered by add_exchange before a flush
 
 
-@dataclass
+class SessionMode(IntEnum):
+    QUESTION_BY_QUESTION = 0
+    FULL_INTERVIEW = 1
+    
+    @property
+    def label(self) -> str:
+        """String name of the mode, as used by the API and in transcripts."""
+        return _MODE_LABELS[self]
+    
+    @classmethod
+    def _missing_(cls, value):
+        # Modes used to be str-valued: SessionMode("full_interview") still works
+        for member, label in _MODE_LABELS.items():
+            if value == label:
+                return member
+        return None
+
+
+_MODE_LABELS = {
+    SessionMode.QUESTION_BY_QUESTION: "question_by_question",
+    SessionMode.FULL_INTERVIEW: "full_interview",
+}
+
+
+class Issue(IntFlag):
+    """Answer problems the coach flags (see prompts/coach_prompt.py)."""
+    TICS_VERBAUX = 1
+    PAS_EXEMPLE = 2
+    TROP_LONG = 4
+    MANQUE_STRUCTURE = 8
+    PAS_LIEN_XHEC = 16
+
+
+@dataclass(slots=True)
 class QuestionResponse:
     """Stores a question and its response with feedback."""
     question: str
     response: str
     feedback: Optional[str] = None
-    timestamp: datetime = field(default_factory=datetime.now)
+    timestamp: float = field(default_factory=time.time)  # epoch seconds, formatted when exported
     score: Optional[int] = None  # 1-10
-    issues: list[str] = field(default_factory=list)  # e.g., ["tics_verbaux", "pas_exemple"]
+    issues: Issue = Issue(0)  # e.g., Issue.TICS_VERBAUX | Issue.PAS_EXEMPLE
+    
+    @property
+    def issue_labels(self) -> list[str]:
+        """Flagged issues by name, e.g. ["tics_verbaux", "pas_exemple"]."""
+        return [issue.name.lower() for issue in Issue if issue in self.issues]
 
 
-@dataclass
+@dataclass(slots=True)
 class Session:
-    """Represents a coaching session."""
-    id: str
+    """Represents a coaching session (slotted: no attributes beyond the fields)."""
+    id: bytes  # raw 16-byte UUID; str_id is the form exposed to clients
     mode: SessionMode
     cv_content: str
     questions_list: list[str]
     user_answers: dict[str, str]  # Question answers from Excel
     created_at: datetime
     
-    # Session state
-    current_question_index: int = 0
-    exchanges: list[QuestionResponse] = field(default_factory=list)
+    # Session state (exchanges are read through the `exchanges` property)
+    _exchanges: list[QuestionResponse] = field(default_factory=list, init=False, repr=False)
     presentation_done: bool = False
     presentation_content: Optional[str] = None
     is_active: bool = True
     
-    # Final summary
-    final_summary: Optional[str] = None
-    transcript: list[dict] = field(default_factory=list)
+    # Final summary: the text, or a callable producing it on demand (e.g. reading it
+    # back from disk); read it with get_final_summary(). end_session can only archive
+    # picklable callables (functools.partial, not lambdas).
+    final_summary: Union[str, Callable[[], str], None] = None
+    
+    # Coach system prompt memoized by InterviewCoach, with the inputs it was built from
+    _system_prompt: Optional[str] = field(default=None, init=False, repr=False, compare=False)
+    _system_prompt_inputs: Optional[tuple] = field(default=None, init=False, repr=False, compare=False)
+    
+    # Questions not answered yet, in list order (kept in sync by add_exchange)
+    remaining_questions: deque = field(init=False, repr=False, compare=False)
+    
+    # created_at as shown in transcripts, formatted once
+    _created_at_str: str = field(init=False, repr=False, compare=False)
+    
+    # Exchanges added since the last flush(), appended to _exchanges in one batch
+    _pending: deque = field(init=False, repr=False, compare=False)
+    
+    # Last get_transcript_text output, with the state fingerprint it was built from
+    _transcript_key: Optional[tuple] = field(default=None, init=False, repr=False, compare=False)
+    _transcript_text: str = field(default="", init=False, repr=False, compare=False)
+    
+    # Cursor over questions_list for get_next_question
+    _question_iter: Iterator[str] = field(init=False, repr=False, compare=False)
+    
+    # blake2b digest of cv_content, set by SessionManager (which shares one copy per CV)
+    _cv_key: bytes = field(default=b"", init=False, repr=False, compare=False)
+    
+    # time.monotonic() of the last SessionManager lookup, for idle eviction
+    last_access_ts: float = field(default_factory=time.monotonic, repr=False, compare=False)
+    
+    def __post_init__(self):
+        self.remaining_questions = deque(self.questions_list)
+        self._created_at_str = self.created_at.strftime('%Y-%m-%d %H:%M')
+        self._question_iter = iter(self.questions_list)
+        self._pending = deque(maxlen=PENDING_EXCHANGES)
+    
+    @property
+    def str_id(self) -> str:
+        """The session id in canonical UUID string form."""
+        return str(uuid.UUID(bytes=self.id))
     
     def add_exchange(self, question: str, response: str, feedback: Optional[str] = None):
         """Add a Q&A exchange to the session."""
-        exchange = QuestionResponse(
-            question=question,
-            response=response,
-            feedback=feedback
-        )
-        self.exchanges.append(exchange)
-        self.transcript.append({
-            "timestamp": exchange.timestamp.isoformat(),
-            "question": question,
-            "response": response,
-            "feedback": feedback
-        })
+        exchange = QuestionResponse(question=question, response=response, feedback=feedback)
+        self._pending.append(exchange)
+        if len(self._pending) == PENDING_EXCHANGES:
+            self.flush()
+        try:
+            self.remaining_questions.remove(question)
+        except ValueError:
+            pass
+    
+    def flush(self):
+        """
+        Move buffered exchanges into the exchange list in one extend().
+        
+        The list is not preallocated: readers index and iterate it directly,
+        so placeholder slots would leak out, and an extend() of a known-size
+        batch already grows it in a single resize.
+        """
+        if self._pending:
+            self._exchanges.extend(self._pending)
+            self._pending.clear()
+    
+    @property
+    def exchanges(self) -> list[QuestionResponse]:
+        """All Q&A exchanges, oldest first (flushes the buffer)."""
+        self.flush()
+        return self._exchanges
+    
+    def transcript_iter(self) -> Iterator[dict]:
+        """Yield the exchanges as transcript dicts, one at a time (for streaming exports)."""
+        for exchange in self.exchanges:
+            yield {
+                "timestamp": datetime.fromtimestamp(exchange.timestamp).isoformat(timespec="seconds"),
+                "question": exchange.question,
+                "response": exchange.response,
+                "feedback": exchange.feedback,
+                "issues": exchange.issue_labels
+            }
+    
+    @property
+    def transcript(self) -> list[dict]:
+        """The exchanges as transcript dicts, built on demand from self.exchanges."""
+        return list(self.transcript_iter())
         
+    @property
+    def current_question_index(self) -> int:
+        """How many questions get_next_question has handed out."""
+        return len(self.questions_list) - length_hint(self._question_iter)
+    
     def get_next_question(self) -> Optional[str]:
         """Get the next question from the list."""
-        if self.current_question_index < len(self.questions_list):
-            question = self.questions_list[self.current_question_index]
-            self.current_question_index += 1
-            return question
-        return None
+        return next(self._question_iter, None)
     
     def get_random_question(self) -> Optional[str]:
         """Get a random question from the list."""
-        import random
-        if self.questions_list:
-            return random.choice(self.questions_list)
-        return None
+        return choice(self.questions_list) if self.questions_list else None
+    
+    def get_final_summary(self) -> Optional[str]:
+        """The final summary text, evaluating it if it is stored lazily."""
+        summary = self.final_summary
+        return summary() if callable(summary) else summary
     
     def get_transcript_text(self) -> str:
-        """Generate a text transcript of the session."""
-        lines = [f"=== Session d'entraînement X-HEC ==="]
-        lines.append(f"Date: {self.created_at.strftime('%Y-%m-%d %H:%M')}")
-        lines.append(f"Mode: {self.mode.value}")
-        lines.append("")
+        """Generate a text transcript of the session (rebuilt only when the session changed)."""
+        # Exchanges are append-only, so their count identifies the transcript state
+        key = (len(self._exchanges) + len(self._pending), self.final_summary, self.presentation_content)
+        if key == self._transcript_key:
+            return self._transcript_text
         
-        if self.presentation_content:
-            lines.append("--- Présentation ---")
-            lines.append(self.presentation_content)
-            lines.append("")
+        final_summary = self.get_final_summary()
         
-        for i, exchange in enumerate(self.exchanges, 1):
-            lines.append(f"--- Question {i} ---")
-            lines.append(f"Q: {exchange.question}")
-            lines.append(f"R: {exchange.response}")
-            if exchange.feedback:
-                lines.append(f"Feedback: {exchange.feedback}")
-            lines.append("")
+        render = _RENDERERS[bool(self.presentation_content), bool(final_summary)]
         
-        if self.final_summary:
-            lines.append("--- Résumé Final ---")
-            lines.append(self.final_summary)
-        
-        return "\n".join(lines)
+        self._transcript_key = key
+        self._transcript_text = render(self, final_summary)
+        return self._transcript_text
 
 
-class SessionManager:
-    """Manages all active sessions."""
+# ============ Transcript rendering ============
+# Each writer appends one section to the transcript buffer. _RENDERERS holds
+# one renderer per (presentation?, summary?) shape, made of only the sections
+# that shape has, so rendering does not re-test them.
+
+def _write_header(session: Session, w: Callable[[str], int], final_summary: Optional[str]):
+    w("=== Session d'entraînement X-HEC ===\nDate: ")
+    w(session._created_at_str)
+    w("\nMode: ")
+    w(session.mode.label)
+    w("\n")
+
+
+def _write_presentation(session: Session, w: Callable[[str], int], final_summary: Optional[str]):
+    w("\n--- Présentation ---\n")
+    w(session.presentation_content)
+    w("\n")
+
+
+def _write_exchanges(session: Session, w: Callable[[str], int], final_summary: Optional[str]):
+    for number, exchange in enumerate(session.exchanges, 1):
+        w(f"\n--- Question {number} ---\nQ: ")
+        w(exchange.question)
+        w("\nR: ")
+        w(exchange.response)
+        if exchange.feedback:
+            w("\nFeedback: ")
+            w(exchange.feedback)
+        w("\n")
+
+
+def _write_summary(session: Session, w: Callable[[str], int], final_summary: Optional[str]):
+    w("\n--- Résumé Final ---\n")
+    w(final_summary)
+
+
+def _make_renderer(has_presentation: bool, has_summary: bool) -> Callable[[Session, Optional[str]], str]:
+    """Transcript renderer for sessions with this shape."""
+    writers = (
+        (_write_header,)
+        + ((_write_presentation,) if has_presentation else ())
+        + (_write_exchanges,)
+        + ((_write_summary,) if has_summary else ())
+    )
+    
+    def render(session: Session, final_summary: Optional[str]) -> str:
+        buf = io.StringIO()  # one buffer, no intermediate list of line strings
+        w = buf.write
+        for write in writers:
+            write(session, w, final_summary)
+        return buf.getvalue()
+    
+    return render
+
+
+_RENDERERS = {
+    (has_presentation, has_summary): _make_renderer(has_presentation, has_summary)
+    for has_presentation in (False, True)
+    for has_summary in (False, True)
+}
+
+
+def _uuid7_bytes() -> bytes:
+    """A time-ordered UUIDv7 (RFC 9562): 48-bit ms timestamp, then random bits."""
+    rand = bytearray(os.urandom(10))
+    rand[0] = 0x70 | (rand[0] & 0x0F)  # version 7
+    rand[2] = 0x80 | (rand[2] & 0x3F)  # RFC 4122 variant
+    timestamp_ms = time.time_ns() // 1_000_000
+    return timestamp_ms.to_bytes(6, "big") + bytes(rand)
+
+
+class _ArchivedSession:
+    """Placeholder for an ended session whose state was written to ARCHIVE_DIR."""
+    __slots__ = ("path", "last_access_ts")
+    
+    is_active = False
+    
+    def __init__(self, path: Path, last_access_ts: float):
+        self.path = path
+        self.last_access_ts = last_access_ts
+
+
+class _SessionShard:
+    """One slice of the session table, with its own lock."""
+    __slots__ = ("sessions", "lock")
     
     def __init__(self):
-        self.sessions: dict[str, Session] = {}
+        # Keyed by the raw 16-byte UUID (smaller and cheaper to hash than the str form)
+        self.sessions: OrderedDict[bytes, Union[Session, _ArchivedSession]] = OrderedDict()
+        self.lock = threading.Lock()
+
+
+class SessionManager:
+    """
+    Manages all active sessions.
+    
+    Sessions are kept in least-recently-used order. Ended sessions idle for
+    more than max_idle seconds are swept, and beyond max_sessions the least
+    recently used ones are evicted, so a long-running server stays bounded.
+    Sweeps run opportunistically from create_session.
+    
+    Ended sessions are archived to ARCHIVE_DIR (zlib-compressed pickle) and
+    replaced by a small placeholder; get_session loads them back on demand.
+    
+    The table is split into SHARDS independently locked shards (by key hash),
+    so threads working on different sessions rarely wait on each other. LRU
+    order, limits and sweeps apply per shard. Archive I/O runs outside the locks.
+    
+    Sessions with the same CV share a single cv_content string, reference
+    counted by the loaded sessions using it and dropped with the last one.
+    """
+    SHARDS = 16  # power of two
+    
+    def __init__(self, max_sessions: int = 10_000, max_idle: float = 900, sweep_threshold: int = 1_000):
+        self._shards = [_SessionShard() for _ in range(self.SHARDS)]
+        self.max_sessions = max_sessions
+        self.max_idle = max_idle
+        self.sweep_threshold = sweep_threshold
+        # CV digest -> the cv_content string shared by sessions with that CV,
+        # and how many loaded sessions use it
+        self._cv_store: dict[bytes, str] = {}
+        self._cv_refs: dict[bytes, int] = {}
+        self._cv_lock = threading.Lock()
+    
+    def __len__(self) -> int:
+        return sum(len(shard.sessions) for shard in self._shards)
+    
+    def _shard(self, session_id: bytes) -> _SessionShard:
+        return self._shards[hash(session_id) & (self.SHARDS - 1)]
     
     def create_session(
         self,
@@ -115,31 +348,165 @@ class SessionManager:
         user_answers: dict[str, str]
     ) -> Session:
         """Create a new coaching session."""
-        session_id = str(uuid.uuid4())
+        session_id = _uuid7_bytes()  # time-ordered: ids sort by creation time
+        cv_key = hashlib.blake2b(cv_content.encode("utf-8"), digest_size=16).digest()
         session = Session(
             id=session_id,
             mode=mode,
-            cv_content=cv_content,
+            cv_content=self._shared_cv(cv_key, cv_content),
             questions_list=questions_list,
             user_answers=user_answers,
             created_at=datetime.now()
         )
-        self.sessions[session_id] = session
+        session._cv_key = cv_key
+        shard = self._shard(session_id)
+        removed = []
+        with shard.lock:
+            shard.sessions[session_id] = session
+            if len(shard.sessions) > self.sweep_threshold // self.SHARDS:
+                removed = self._sweep_shard(shard, self.max_idle, time.monotonic())
+        self._forget(removed)
         return session
     
-    def get_session(self, session_id: str) -> Optional[Session]:
-        """Retrieve a session by ID."""
-        return self.sessions.get(session_id)
+    def _shared_cv(self, cv_key: bytes, cv_content: str) -> str:
+        """The stored copy of this CV (registering cv_content if it is new), for one more session."""
+        with self._cv_lock:
+            self._cv_refs[cv_key] = self._cv_refs.get(cv_key, 0) + 1
+            return self._cv_store.setdefault(cv_key, cv_content)
     
-    def end_session(self, session_id: str):
-        """Mark a session as ended."""
-        if session_id in self.sessions:
-            self.sessions[session_id].is_active = False
+    def _release_cv(self, cv_key: bytes):
+        """A loaded session stopped using this CV; drop it after the last one."""
+        with self._cv_lock:
+            refs = self._cv_refs.pop(cv_key, 0) - 1
+            if refs > 0:
+                self._cv_refs[cv_key] = refs
+            else:
+                self._cv_store.pop(cv_key, None)
     
-    def delete_session(self, session_id: str):
-        """Delete a session."""
-        if session_id in self.sessions:
-            del self.sessions[session_id]
+    def _forget(self, entries: list):
+        """Release what evicted table entries held (call without shard locks)."""
+        for entry in entries:
+            if isinstance(entry, _ArchivedSession):
+                entry.path.unlink(missing_ok=True)
+            else:
+                self._release_cv(entry._cv_key)
+    
+    @staticmethod
+    def _key(session_id: Union[str, bytes]) -> Optional[bytes]:
+        """Table key for an id given as a UUID string or raw bytes (None if malformed)."""
+        if isinstance(session_id, bytes):
+            return session_id
+        try:
+            return uuid.UUID(session_id).bytes
+        except ValueError:
+            return None
+    
+    def get_session(self, session_id: Union[str, bytes]) -> Optional[Session]:
+        """Retrieve a session by ID (marks it as recently used, loads it back if archived)."""
+        session_id = self._key(session_id)
+        shard = self._shard(session_id)
+        with shard.lock:
+            session = shard.sessions.get(session_id)
+        if session is None:
+            return None
+        
+        if isinstance(session, _ArchivedSession):
+            archived, session = session, self._load_archive(session)
+            with shard.lock:
+                current = shard.sessions.get(session_id)
+                if current is archived:
+                    if session is None:
+                        del shard.sessions[session_id]
+                        return None
+                    if session._cv_key:
+                        session.cv_content = self._shared_cv(session._cv_key, session.cv_content)
+                    shard.sessions[session_id] = session
+                elif current is None or isinstance(current, _ArchivedSession):
+                    return None  # deleted or archived again meanwhile
+                else:
+                    session = current  # another thread loaded it first
+        
+        with shard.lock:
+            if session_id in shard.sessions:
+                shard.sessions.move_to_end(session_id)
+        session.last_access_ts = time.monotonic()
+        return session
+    
+    def end_session(self, session_id: Union[str, bytes]):
+        """Mark a session as ended and move its state to disk."""
+        session_id = self._key(session_id)
+        shard = self._shard(session_id)
+        with shard.lock:
+            session = shard.sessions.get(session_id)
+        if session is None or isinstance(session, _ArchivedSession):
+            return
+        
+        session.is_active = False
+        path = ARCHIVE_DIR / f"{session.str_id}.pkl.z"
+        try:
+            ARCHIVE_DIR.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(zlib.compress(pickle.dumps(session, pickle.HIGHEST_PROTOCOL), level=1))
+        except Exception as e:
+            logger.warning("⚠️ Could not archive session %s: %s", session.str_id, e)
+            return  # stays in memory
+        
+        # Unlinked only: the caller may still hold it
+        with shard.lock:
+            archived = shard.sessions.get(session_id) is session
+            if archived:
+                shard.sessions[session_id] = _ArchivedSession(path, session.last_access_ts)
+        if archived:
+            self._release_cv(session._cv_key)
+    
+    def delete_session(self, session_id: Union[str, bytes]):
+        """Delete a session (and its archive file if it was archived)."""
+        session_id = self._key(session_id)
+        shard = self._shard(session_id)
+        with shard.lock:
+            session = shard.sessions.pop(session_id, None)
+        if isinstance(session, _ArchivedSession):
+            session.path.unlink(missing_ok=True)
+        elif session is not None:
+            self._release_cv(session._cv_key)
+    
+    @staticmethod
+    def _load_archive(archived: _ArchivedSession) -> Optional[Session]:
+        try:
+            return pickle.loads(zlib.decompress(archived.path.read_bytes()))
+        except Exception as e:
+            logger.warning("⚠️ Could not load archived session %s: %s", archived.path.name, e)
+            return None
+    
+    def sweep(self, max_idle: Optional[float] = None) -> int:
+        """
+        Drop ended sessions idle for more than max_idle seconds, then the least
+        recently used sessions beyond max_sessions. Returns how many were dropped.
+        
+        Evicted sessions are only unlinked, since a caller may still hold a
+        reference to them; evicted archives are deleted.
+        """
+        max_idle = self.max_idle if max_idle is None else max_idle
+        now = time.monotonic()
+        evicted = 0
+        for shard in self._shards:
+            with shard.lock:
+                removed = self._sweep_shard(shard, max_idle, now)
+            self._forget(removed)
+            evicted += len(removed)
+        return evicted
+    
+    def _sweep_shard(self, shard: _SessionShard, max_idle: float, now: float) -> list:
+        """sweep() for one shard (caller holds its lock); returns the removed entries for _forget."""
+        sessions = shard.sessions
+        dead = [
+            session_id for session_id, session in sessions.items()
+            if not session.is_active and now - session.last_access_ts > max_idle
+        ]
+        removed = [sessions.pop(session_id) for session_id in dead]
+        
+        while len(sessions) > self.max_sessions // self.SHARDS:
+            removed.append(sessions.popitem(last=False)[1])
+        return removed
 
 
 # Global session manager instance
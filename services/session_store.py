@@ -0,0 +1,223 @@
+"""
+Session storage for the sequential voice flow.
+
+Sessions live in Redis when REDIS_URL is set so that every uvicorn worker
+sees the same state. Without it we fall back to a per-process TTL cache.
+Either way a session expires SESSION_TTL seconds after its last save.
+"""
+
+import os
+import uuid
+from typing import Optional, List, Dict
+
+import orjson
+import redis.asyncio as aioredis
+from cachetools import TTLCache
+from pydantic import BaseModel, Field, PrivateAttr
+
+SESSION_TTL = 3600  # seconds
+MAX_SESSIONS = 10_000  # in-memory fallback only
+DOSSIER_TTL = 600  # seconds between upload and session creation
+SPEECH_TTL = 600  # seconds a spoken-text URL stays playable
+LOCAL_CACHE_TTL = 5  # seconds a worker keeps its own copy of a Redis session
+MAX_TRANSCRIPT_ENTRIES = 2000  # oldest turns are dropped beyond this
+REV_FIELD = "_rev"  # bumped on every save, lets a worker revalidate its copy cheaply
+
+
+class Session(BaseModel):
+    session_id: str
+    mode: str
+    dossier_text: str
+    transcript: List[Dict[str, str]] = Field(default_factory=list)
+    current_theme: Optional[str] = None
+    current_question: Optional[str] = None
+    asked_questions: List[str] = Field(default_factory=list)
+    started: bool = False
+    
+    # Set mirror of asked_questions for O(1) membership checks (not persisted)
+    _asked_set: Optional[set] = PrivateAttr(default=None)
+    # Redis revision this copy was loaded at / last saved as (not persisted)
+    _rev: int = PrivateAttr(default=0)
+    
+    @property
+    def asked_set(self) -> set:
+        if self._asked_set is None:
+            self._asked_set = set(self.asked_questions)
+        return self._asked_set
+    
+    def add_message(self, role: str, content: str):
+        """
+        Append a turn to the transcript.
+        
+        Consecutive messages from the same speaker (e.g. the intro followed by
+        the first question) are merged into one entry, and the transcript is
+        capped at MAX_TRANSCRIPT_ENTRIES, so long sessions stay small to store.
+        """
+        if self.transcript and self.transcript[-1]["role"] == role:
+            last = self.transcript[-1]
+            last["content"] = f"{last['content']}\n\n{content}"
+            return
+        
+        self.transcript.append({"role": role, "content": content})
+        if len(self.transcript) > MAX_TRANSCRIPT_ENTRIES:
+            del self.transcript[:len(self.transcript) - MAX_TRANSCRIPT_ENTRIES]
+    
+    def mark_asked(self, question: str):
+        """Record a question as asked."""
+        self.asked_questions.append(question)
+        self.asked_set.add(question)
+    
+    def available_questions(self, questions: List[str]) -> List[str]:
+        """Filter out questions already asked in this session."""
+        asked = self.asked_set
+        return [q for q in questions if q not in asked]
+
+
+_redis: Optional[aioredis.Redis] = None
+_redis_initialized = False
+_sessions: TTLCache = TTLCache(maxsize=MAX_SESSIONS, ttl=SESSION_TTL)
+_dossiers: TTLCache = TTLCache(maxsize=MAX_SESSIONS, ttl=DOSSIER_TTL)
+_speech_texts: TTLCache = TTLCache(maxsize=MAX_SESSIONS, ttl=SPEECH_TTL)
+# session_id -> (revision, Session) for the Redis backend
+_local_sessions: TTLCache = TTLCache(maxsize=1024, ttl=LOCAL_CACHE_TTL)
+
+
+def get_redis() -> Optional[aioredis.Redis]:
+    """
+    Return the shared, connection-pooled Redis client.
+    
+    Created on first use (after .env is loaded); None when REDIS_URL is unset.
+    """
+    global _redis, _redis_initialized
+    if not _redis_initialized:
+        redis_url = os.environ.get("REDIS_URL")
+        if redis_url:
+            _redis = aioredis.from_url(redis_url, max_connections=32)
+        _redis_initialized = True
+    return _redis
+
+
+async def close_redis():
+    """Close the Redis connection pool, if any."""
+    global _redis, _redis_initialized
+    if _redis is not None:
+        await _redis.aclose()
+    _redis = None
+    _redis_initialized = False
+
+
+def _session_key(session_id: str) -> str:
+    return f"sess:{session_id}"
+
+
+async def load_session(session_id: str) -> Optional[Session]:
+    """Load a session from the store, or None if it does not exist."""
+    redis = get_redis()
+    if redis is None:
+        return _sessions.get(session_id)
+    
+    key = _session_key(session_id)
+    
+    # A recent local copy is reused if nobody saved since (one tiny HGET
+    # instead of pulling the whole transcript and dossier back)
+    cached = _local_sessions.get(session_id)
+    if cached is not None:
+        rev = await redis.hget(key, REV_FIELD)
+        if rev is not None and int(rev) == cached[0]:
+            return cached[1].model_copy(deep=True)
+    
+    data = await redis.hgetall(key)
+    if not data:
+        _local_sessions.pop(session_id, None)
+        return None
+    
+    rev = int(data.pop(REV_FIELD.encode(), 0))
+    session = Session.model_validate({k.decode(): orjson.loads(v) for k, v in data.items()})
+    session._rev = rev
+    _local_sessions[session_id] = (rev, session.model_copy(deep=True))
+    return session
+
+
+async def save_session(session: Session, *fields: str):
+    """
+    Persist a session to the store.
+    
+    Each model field is stored as its own Redis hash field, so callers can
+    pass only the fields they changed (e.g. "asked_questions") instead of
+    re-serializing the whole transcript.
+    """
+    redis = get_redis()
+    if redis is None:
+        _sessions[session.session_id] = session
+        return
+    
+    data = session.model_dump(include=set(fields) if fields else None)
+    key = _session_key(session.session_id)
+    async with redis.pipeline(transaction=True) as pipe:
+        pipe.hset(key, mapping={k: orjson.dumps(v) for k, v in data.items()})
+        pipe.hincrby(key, REV_FIELD, 1)
+        pipe.expire(key, SESSION_TTL)
+        _, rev, _ = await pipe.execute()
+    
+    # If nobody else saved in between, this copy is exactly what Redis now holds
+    if rev == session._rev + 1:
+        _local_sessions[session.session_id] = (rev, session.model_copy(deep=True))
+    else:
+        _local_sessions.pop(session.session_id, None)
+    session._rev = rev
+
+
+async def store_dossier(dossier_text: str) -> str:
+    """Keep an uploaded dossier server-side and return a short-lived token for it."""
+    token = str(uuid.uuid4())
+    redis = get_redis()
+    if redis is None:
+        _dossiers[token] = dossier_text
+    else:
+        await redis.set(f"dossier:{token}", dossier_text.encode("utf-8"), ex=DOSSIER_TTL)
+    return token
+
+
+async def load_dossier(token: str) -> Optional[str]:
+    """Fetch the dossier behind a token, or None if it expired."""
+    redis = get_redis()
+    if redis is None:
+        return _dossiers.get(token)
+    
+    data = await redis.get(f"dossier:{token}")
+    return data.decode("utf-8") if data is not None else None
+
+
+async def store_speech_text(text: str) -> str:
+    """Keep a text to be spoken server-side and return a short-lived key for it."""
+    key = str(uuid.uuid4())
+    redis = get_redis()
+    if redis is None:
+        _speech_texts[key] = text
+    else:
+        await redis.set(f"speech:{key}", text.encode("utf-8"), ex=SPEECH_TTL)
+    return key
+
+
+async def load_speech_text(key: str) -> Optional[str]:
+    """Fetch the text behind a speech key, or None if it expired."""
+    redis = get_redis()
+    if redis is None:
+        return _speech_texts.get(key)
+    
+    data = await redis.get(f"speech:{key}")
+    return data.decode("utf-8") if data is not None else None
+
+
+def gc_sessions() -> dict:
+    """Evict expired in-memory sessions now; Redis expires keys on its own."""
+    if get_redis() is not None:
+        return {"backend": "redis", "evicted": 0}
+    
+    before = len(_sessions)
+    _sessions.expire()
+    return {
+        "backend": "memory",
+        "evicted": before - len(_sessions),
+        "active": len(_sessions)
+    }
@@ -0,0 +1,47 @@
+"""Local speech-to-text with faster-whisper (CTranslate2), used when STT_BACKEND=faster_whisper."""
+
+import io
+import os
+import asyncio
+
+# large-v3-turbo is multilingual; distil-large-v3 only transcribes English
+MODEL_NAME = os.environ.get("FASTER_WHISPER_MODEL", "large-v3-turbo")
+
+_model = None
+
+
+def get_model():
+    """Load the Whisper model once, on GPU when available."""
+    global _model
+    if _model is None:
+        import ctranslate2
+        from faster_whisper import WhisperModel
+        
+        if ctranslate2.get_cuda_device_count() > 0:
+            _model = WhisperModel(MODEL_NAME, device="cuda", compute_type="int8_float16")
+        else:
+            _model = WhisperModel(MODEL_NAME, device="cpu", compute_type="int8")
+    return _model
+
+
+def _transcribe(audio_bytes: bytes) -> str:
+    segments, _ = get_model().transcribe(
+        io.BytesIO(audio_bytes),
+        language="fr",
+        beam_size=1,
+        vad_filter=True
+    )
+    return " ".join(segment.text.strip() for segment in segments)
+
+
+async def transcribe_local(audio_bytes: bytes) -> str:
+    """
+    Transcribe audio with the local model.
+    
+    Args:
+        audio_bytes: Raw audio bytes (webm, mp3, wav, etc.)
+    
+    Returns:
+        Transcribed text
+    """
+    return await asyncio.to_thread(_transcribe, audio_bytes)
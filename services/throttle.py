@@ -0,0 +1,79 @@
+"""Client-side request/token budget for OpenAI calls (proactive, instead of waiting for 429s)."""
+
+import time
+import asyncio
+from functools import cache
+from typing import Any, Iterator
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+
+class RateLimiter:
+    """
+    Token bucket over requests per minute and tokens per minute.
+    
+    acquire() waits until both budgets allow the call. Waiters are served
+    in arrival order, so a large request is not starved by small ones.
+    """
+    
+    def __init__(self, rpm: int, tpm: int):
+        self.rpm = rpm
+        self.tpm = tpm
+        self._requests = float(rpm)
+        self._tokens = float(tpm)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+    
+    def _refill(self):
+        now = time.monotonic()
+        elapsed, self._updated = now - self._updated, now
+        self._requests = min(self.rpm, self._requests + elapsed * self.rpm / 60)
+        self._tokens = min(self.tpm, self._tokens + elapsed * self.tpm / 60)
+    
+    async def acquire(self, tokens: int = 0):
+        """Take one request and `tokens` tokens from the budget, waiting if needed."""
+        tokens = min(tokens, self.tpm)  # an oversized request still gets through eventually
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._requests >= 1 and self._tokens >= tokens:
+                    self._requests -= 1
+                    self._tokens -= tokens
+                    return
+                
+                wait = max(
+                    (1 - self._requests) / self.rpm,
+                    (tokens - self._tokens) / self.tpm
+                ) * 60
+                await asyncio.sleep(wait)
+
+
+@cache
+def _encoder():
+    return tiktoken.get_encoding("o200k_base")  # gpt-4o / gpt-4o-mini tokenizer
+
+
+def estimate_tokens(text: str) -> int:
+    """Token count of a prompt (tiktoken when installed, else ~4 characters per token)."""
+    if tiktoken is not None:
+        return len(_encoder().encode(text, disallowed_special=()))
+    return len(text) // 4 + 1
+
+
+def _strings(value: Any) -> Iterator[str]:
+    if isinstance(value, str):
+        yield value
+    elif isinstance(value, dict):
+        for item in value.values():
+            yield from _strings(item)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            yield from _strings(item)
+
+
+def estimate_call_tokens(*args, **kwargs) -> int:
+    """Rough prompt size of a call from the text in its arguments (audio bytes count as 0)."""
+    return sum(estimate_tokens(text) for text in _strings([args, kwargs]))
@@ -9,7 +9,7 @@ const state = {
     // Session
     sessionId: null,
     mode: null,
-    dossierText: '',
+    dossierToken: null,
     
     // Themes & Questions
     themes: {},
@@ -24,6 +24,9 @@ const state = {
     // Audio
     mediaRecorder: null,
     audioChunks: [],
+    transcribeSocket: null,
+    finalTranscript: null,
+    stopRequested: false,
     isRecording: false,
     isPlaying: false,
     isProcessing: false,
@@ -153,14 +156,22 @@ async function initMediaRecorder() {
         
         state.mediaRecorder.ondataavailable = (event) => {
             if (event.data.size > 0) {
-                state.audioChunks.push(event.data);
+                const socket = state.transcribeSocket;
+                if (socket && socket.readyState === WebSocket.OPEN) {
+                    socket.send(event.data);
+                } else {
+                    state.audioChunks.push(event.data);
+                }
             }
         };
         
         state.mediaRecorder.onstop = async () => {
-            const audioBlob = new Blob(state.audioChunks, { type: 'audio/webm' });
-            state.audioChunks = [];
-            await processUserAudio(audioBlob);
+            state.stopRequested = true;
+            const socket = state.transcribeSocket;
+            if (socket.readyState === WebSocket.OPEN) {
+                socket.send('stop');
+            }
+            await processUserAudio();
         };
         
         return true;
@@ -171,11 +182,47 @@ async function initMediaRecorder() {
     }
 }
 
+function openTranscribeSocket() {
+    // Audio is streamed while the user speaks; the server sends interim
+    // transcripts and a final one once it receives "stop".
+    const protocol = location.protocol === 'https:' ? 'wss' : 'ws';
+    const socket = new WebSocket(`${protocol}://${location.host}/ws/transcribe`);
+    
+    state.stopRequested = false;
+    state.finalTranscript = new Promise((resolve, reject) => {
+        const handlers = {
+            partial: (message) => {
+                if (state.isRecording) elements.voiceStatus.textContent = message.text;
+            },
+            final: (message) => {
+                resolve(message.text);
+                socket.close();
+            }
+        };
+        socket.onmessage = (event) => {
+            const message = JSON.parse(event.data);
+            handlers[message.type]?.(message);
+        };
+        socket.onerror = () => reject(new Error('Transcription failed'));
+        socket.onclose = () => reject(new Error('Transcription failed'));
+    });
+    
+    socket.onopen = () => {
+        // Flush chunks recorded before the connection was ready
+        state.audioChunks.forEach(chunk => socket.send(chunk));
+        state.audioChunks = [];
+        if (state.stopRequested) socket.send('stop');
+    };
+    
+    return socket;
+}
+
 function startRecording() {
     if (!state.mediaRecorder || state.isRecording || state.isProcessing || state.isPlaying) return;
     
     state.audioChunks = [];
-    state.mediaRecorder.start();
+    state.transcribeSocket = openTranscribeSocket();
+    state.mediaRecorder.start(500);  // Emit a chunk every 500ms
     state.isRecording = true;
     setVoiceState('recording');
 }
@@ -203,25 +250,16 @@ function toggleRecording() {
     }
 }
 
-async function processUserAudio(audioBlob) {
+async function processUserAudio() {
     try {
-        // 1. Transcribe with Whisper
-        const formData = new FormData();
-        formData.append('audio', audioBlob, 'recording.webm');
-        
-        const transcribeRes = await fetch('/api/transcribe', {
-            method: 'POST',
-            body: formData
-        });
-        
-        if (!transcribeRes.ok) throw new Error('Transcription failed');
-        
-        const { text: userText } = await transcribeRes.json();
+        // 1. Wait for the final Whisper transcript of the streamed audio
+        const userText = await state.finalTranscript;
         
         // Add to transcript
         state.transcript.push({ role: 'user', content: userText });
         
-        // 2. Send to backend for response
+        // 2. Stream the coach's reply: text is shown as it arrives and
+        //    each sentence's audio is queued as soon as it is synthesized
         const responseFormData = new FormData();
         responseFormData.append('user_text', userText);
         
@@ -232,7 +270,10 @@ async function processUserAudio(audioBlob) {
         
         if (!responseRes.ok) throw new Error('Response failed');
         
-        const responseData = await responseRes.json();
+        elements.coachText.textContent = '';
+        const { data: responseData, playback } = await readCoachTurn(responseRes);
+        
+        if (!responseData) throw new Error('Response failed');
         
         // Add to transcript
         state.transcript.push({ role: 'assistant', content: responseData.text });
@@ -242,9 +283,9 @@ async function processUserAudio(audioBlob) {
         state.questionsAnswered++;
         updateNextQuestionButton();
         
-        // 3. Display and play response
+        // 3. Wait for the last sentence to finish playing
         elements.coachText.textContent = responseData.text;
-        await playAudioBase64(responseData.audio_base64);
+        await playback;
         
     } catch (error) {
         console.error('Process error:', error);
@@ -255,33 +296,78 @@ async function processUserAudio(audioBlob) {
     }
 }
 
-async function playAudioBase64(base64Audio) {
-    return new Promise((resolve) => {
-        const audioData = atob(base64Audio);
-        const arrayBuffer = new ArrayBuffer(audioData.length);
-        const uint8Array = new Uint8Array(arrayBuffer);
-        for (let i = 0; i < audioData.length; i++) {
-            uint8Array[i] = audioData.charCodeAt(i);
+async function readCoachTurn(response, onQuestion = null) {
+    // Show a streamed coach turn as it arrives and queue each sentence's
+    // audio as soon as it is synthesized; resolves with the "done" event
+    // once the text is complete (playback may still be running)
+    let playback = Promise.resolve();
+    let data = null;
+    
+    // One handler per event type, looked up once per event
+    const handlers = {
+        question: (event) => {
+            onQuestion?.(event.question);
+        },
+        text_delta: (event) => {
+            elements.coachText.textContent += event.content;
+        },
+        audio_chunk: (event) => {
+            const bytes = Uint8Array.from(atob(event.b64), c => c.charCodeAt(0));
+            const url = URL.createObjectURL(new Blob([bytes], { type: 'audio/mpeg' }));
+            playback = playback
+                .then(() => playAudioUrl(url))
+                .then(() => URL.revokeObjectURL(url));
+        },
+        done: (event) => {
+            data = event;
         }
-        
-        const blob = new Blob([uint8Array], { type: 'audio/mpeg' });
-        const url = URL.createObjectURL(blob);
-        
-        elements.audioPlayer.src = url;
+    };
+    
+    await readEventStream(response, (event) => handlers[event.type]?.(event));
+    return { data, playback };
+}
+
+async function readEventStream(response, onEvent) {
+    // Minimal Server-Sent Events reader for a fetch() response body
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+            const message = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+            const data = message
+                .split('\n')
+                .filter(line => line.startsWith('data: '))
+                .map(line => line.slice(6))
+                .join('\n');
+            if (data) onEvent(JSON.parse(data));
+        }
+    }
+}
+
+async function playAudioUrl(audioUrl) {
+    return new Promise((resolve) => {
+        // The server streams MP3 chunks, so playback starts before synthesis ends
+        elements.audioPlayer.src = audioUrl;
         state.isPlaying = true;
         setVoiceState('speaking');
         
         elements.audioPlayer.onended = () => {
             state.isPlaying = false;
             setVoiceState('idle');
-            URL.revokeObjectURL(url);
             resolve();
         };
         
         elements.audioPlayer.onerror = () => {
             state.isPlaying = false;
             setVoiceState('idle');
-            URL.revokeObjectURL(url);
             resolve();
         };
         
@@ -308,10 +394,10 @@ async function uploadDossier(file) {
     return res.json();
 }
 
-async function createSession(mode, dossierText) {
+async function createSession(mode, dossierToken) {
     const formData = new FormData();
     formData.append('mode', mode);
-    formData.append('dossier_text', dossierText);
+    formData.append('dossier_token', dossierToken);
     
     const res = await fetch('/api/session/create', {
         method: 'POST',
@@ -359,7 +445,7 @@ async function selectQuestion(question = null, random = false) {
     if (question) formData.append('question', question);
     formData.append('random', random.toString());
     
-    const res = await fetch(`/api/session/${state.sessionId}/select-question`, {
+    const res = await fetch(`/api/session/${state.sessionId}/select-question/stream`, {
         method: 'POST',
         body: formData
     });
@@ -368,7 +454,23 @@ async function selectQuestion(question = null, random = false) {
         const errorData = await res.json().catch(() => ({ detail: 'Unknown error' }));
         throw new Error(errorData.detail || `Error ${res.status}`);
     }
-    return res.json();
+    
+    // Plain JSON when the theme has no question left
+    if (!res.headers.get('content-type')?.startsWith('text/event-stream')) {
+        return res.json();
+    }
+    
+    // Switch to the interview screen right away: the coach starts
+    // speaking the first sentence while the question is still generated
+    hideLoading();
+    showStep('stepInterview');
+    elements.coachText.textContent = '';
+    
+    let chosen = null;
+    const { data, playback } = await readCoachTurn(res, (q) => { chosen = q; });
+    if (!data) throw new Error('Question failed');
+    
+    return { success: true, question: chosen, text: data.text, playback };
 }
 
 async function getDebrief() {
@@ -485,7 +587,7 @@ async function handleUpload(e) {
     
     try {
         const result = await uploadDossier(file);
-        state.dossierText = result._dossier_text;
+        state.dossierToken = result.dossier_token;
         
         hideLoading();
         showStep('stepMode');
@@ -502,7 +604,7 @@ async function handleModeSelect(mode) {
     
     try {
         // Create session
-        const sessionResult = await createSession(mode, state.dossierText);
+        const sessionResult = await createSession(mode, state.dossierToken);
         state.sessionId = sessionResult.session_id;
         
         // Initialize microphone
@@ -534,7 +636,7 @@ async function handleModeSelect(mode) {
             hideLoading();
             showStep('stepInterview');
             
-            await playAudioBase64(introResult.audio_base64);
+            await playAudioUrl(introResult.audio_url);
         }
         } catch (error) {
             hideLoading();
@@ -595,7 +697,7 @@ async function handleQuestionSelect(question) {
         hideLoading();
         showStep('stepInterview');
         
-        await playAudioBase64(result.audio_base64);
+        await result.playback;
         
     } catch (error) {
         hideLoading();
@@ -632,7 +734,7 @@ async function handleRandomQuestion() {
         hideLoading();
         showStep('stepInterview');
         
-        await playAudioBase64(result.audio_base64);
+        await result.playback;
         
     } catch (error) {
         hideLoading();
@@ -680,7 +782,7 @@ async function handleEndSession() {
         showStep('stepDebrief');
         
         // Play summary audio
-        await playAudioBase64(result.audio_base64);
+        await playAudioUrl(result.audio_url);
         
     } catch (error) {
         hideLoading();